@@ -1,10 +1,45 @@
 """Pulumi program for a Standard GKE cluster with Pod Snapshot enabled."""
 
 import pulumi
-import pulumi_kubernetes as kubernetes
-from dotenv import load_dotenv
 
-from components.helpers import required_env, int_env, service_external_ip
+# Imported before the components: config validates every setting before any
+# provider SDK is loaded.
+from config import (
+    project_id,
+    project_number,
+    region,
+    min_gke_cluster_version,
+    cluster_name,
+    machine_type,
+    node_pool_name,
+    agent_sandbox_version,
+    snapshots_bucket_name,
+    snapshot_folder,
+    snapshot_namespace,
+    snapshot_ksa_name,
+    sandbox_template_revision,
+    sandbox_warm_pool_replicas,
+    claude_agent_sandbox_template_revision,
+    claude_agent_sandbox_warm_pool_replicas,
+    pi_agent_sandbox_template_revision,
+    pi_agent_sandbox_warm_pool_replicas,
+    pi_agent_image_version,
+    pi_agent_gemini_api_key,
+    sandbox_router_image,
+    workloads_namespace,
+    fastapi_app_name,
+    fastapi_replicas,
+    fastapi_container_port,
+    fastapi_service_port,
+    cloudbuild_file,
+    cloudbuild_branch_name,
+    cloudbuild_location,
+    cloudbuild_repository,
+    pulumi_parallel_hint,
+    skip_manifest_cache,
+)
+
+from components.helpers import stack_labels_transformation
 from components.cluster import create_cluster
 from components.sandbox_controller import create_sandbox_controller
 from components.workspace_api import create_workspace_api
@@ -13,39 +48,11 @@ from components.python_sandbox_warmpool import create_python_sandbox_warmpool
 from components.claude_agent_warmpool import create_claude_agent_warmpool
 from components.pi_agent_warmpool import create_pi_agent_warmpool
 
-load_dotenv()
+pulumi.runtime.register_stack_transformation(stack_labels_transformation)
 
-# ── Configuration ─────────────────────────────────────────────────────────────
-gcp_config = pulumi.Config("gcp")
-project_id = gcp_config.require("project")
-region = required_env("GKE_LOCATION")
-min_gke_cluster_version = required_env("GKE_VERSION")
-cluster_name = required_env("CLUSTER_NAME")
-machine_type = required_env("MACHINE_TYPE")
-node_pool_name = required_env("NODE_POOL_NAME")
-agent_sandbox_version = required_env("AGENT_SANDBOX_VERSION")
-snapshots_bucket_name_prefix = required_env("SNAPSHOTS_BUCKET_NAME_PREFIX")
-snapshots_bucket_name = f"{snapshots_bucket_name_prefix}{project_id}"
-snapshot_folder = required_env("SNAPSHOT_FOLDER")
-snapshot_namespace = required_env("SNAPSHOT_NAMESPACE")
-snapshot_ksa_name = required_env("SNAPSHOT_KSA_NAME")
-sandbox_template_revision = required_env("SANDBOX_TEMPLATE_REVISION")
-sandbox_warm_pool_replicas = int_env("SANDBOX_WARM_POOL_REPLICAS", 2)
-claude_agent_sandbox_template_revision = required_env("CLAUDE_AGENT_SANDBOX_TEMPLATE_REVISION")
-claude_agent_sandbox_warm_pool_replicas = int_env("CLAUDE_AGENT_SANDBOX_WARM_POOL_REPLICAS", 2)
-pi_agent_sandbox_template_revision = required_env("PI_AGENT_SANDBOX_TEMPLATE_REVISION")
-pi_agent_sandbox_warm_pool_replicas = int_env("PI_AGENT_SANDBOX_WARM_POOL_REPLICAS", 2)
-pi_agent_image_version = required_env("PI_AGENT_IMAGE_VERSION")
-sandbox_router_image = required_env("SANDBOX_ROUTER_IMAGE")
-workloads_namespace = required_env("WORKLOADS_NAMESPACE")
-fastapi_app_name = required_env("FASTAPI_APP_NAME")
-fastapi_replicas = int_env("FASTAPI_REPLICAS", 1)
-fastapi_container_port = int_env("FASTAPI_CONTAINER_PORT", 8080)
-fastapi_service_port = int_env("FASTAPI_SERVICE_PORT", 80)
-cloudbuild_file = required_env("CLOUDBUILD_FILE")
-cloudbuild_branch_name = required_env("CLOUDBUILD_BRANCH_NAME")
-cloudbuild_location = required_env("CLOUDBUILD_LOCATION")
-cloudbuild_repository = required_env("CLOUDBUILD_REPOSITORY")
+# The IAM grants and Kubernetes objects fan out wide; the engine default
+# parallelism leaves GCP API headroom unused.
+pulumi.log.info(f"Recommended: pulumi up --parallel={pulumi_parallel_hint}")
 
 # ── Components ────────────────────────────────────────────────────────────────
 cluster_result = create_cluster(
@@ -59,6 +66,7 @@ cluster_result = create_cluster(
 
 controller = create_sandbox_controller(
     project_id=project_id,
+    project_number=project_number,
     region=region,
     snapshots_bucket_name=snapshots_bucket_name,
     snapshot_folder=snapshot_folder,
@@ -66,10 +74,12 @@ controller = create_sandbox_controller(
     snapshot_ksa_name=snapshot_ksa_name,
     agent_sandbox_version=agent_sandbox_version,
     node_pool=cluster_result.node_pool,
+    skip_manifest_cache=skip_manifest_cache,
 )
 
 api = create_workspace_api(
     project_id=project_id,
+    project_number=project_number,
     region=region,
     snapshot_ns=controller.snapshot_ns,
     system_node_pool=cluster_result.system_node_pool,
@@ -110,18 +120,6 @@ claude_pool = create_claude_agent_warmpool(
     claude_agent_sandbox_warm_pool_replicas=claude_agent_sandbox_warm_pool_replicas,
 )
 
-# Gemini API key for pi-agent sandbox (consumed via secretKeyRef in the pod spec).
-pi_agent_gemini_secret = kubernetes.core.v1.Secret(
-    "pi-agent-gemini-secret",
-    metadata={
-        "name": "pi-agent-gemini-secret",
-        "namespace": controller.snapshot_ns.metadata["name"],
-    },
-    string_data={
-        "GEMINI_API_KEY": pulumi.Config().require_secret("gemini-api-key"),
-    },
-)
-
 pi_agent_pool = create_pi_agent_warmpool(
     snapshot_ns=controller.snapshot_ns,
     snapshot_ksa=controller.snapshot_ksa,
@@ -130,32 +128,40 @@ pi_agent_pool = create_pi_agent_warmpool(
     pi_agent_sandbox_template_revision=pi_agent_sandbox_template_revision,
     pi_agent_sandbox_warm_pool_replicas=pi_agent_sandbox_warm_pool_replicas,
     pi_agent_image_version=pi_agent_image_version,
-    gemini_api_key_secret_name="pi-agent-gemini-secret",
+    gemini_api_key=pi_agent_gemini_api_key,
 )
 
 # ── Exports ───────────────────────────────────────────────────────────────────
-pulumi.export("project_id", project_id)
-pulumi.export("region", region)
-pulumi.export("cluster_name", cluster_result.cluster.name)
-pulumi.export("system_node_pool_name", cluster_result.system_node_pool.name)
-pulumi.export("sandbox_node_pool_name", cluster_result.node_pool.name)
-pulumi.export("agent_sandbox_version", agent_sandbox_version)
-pulumi.export("snapshots_bucket_name", controller.snapshots_bucket.name)
-pulumi.export("snapshot_folder", snapshot_folder)
-pulumi.export("snapshot_namespace", controller.snapshot_ns.metadata["name"])
-pulumi.export("snapshot_ksa_name", controller.snapshot_ksa.metadata["name"])
-pulumi.export("sandbox_template", python_pool.sandbox_template.metadata["name"])
-pulumi.export("sandbox_template_revision", sandbox_template_revision)
-pulumi.export("sandbox_warm_pool", python_pool.sandbox_warm_pool.metadata["name"])
-pulumi.export("sandbox_warm_pool_replicas", sandbox_warm_pool_replicas)
-pulumi.export("fastapi_deployment", api.fastapi_deployment.metadata["name"])
-pulumi.export("fastapi_service", api.fastapi_service.metadata["name"])
-pulumi.export("fastapi_static_ip", api.fastapi_static_ip.address)
-pulumi.export("fastapi_ingress", api.fastapi_ingress.metadata["name"])
-pulumi.export("sandbox_router_deployment", router.deployment.metadata["name"])
-pulumi.export("sandbox_router_service", router.service.metadata["name"])
-pulumi.export("pi_agent_sandbox_template", pi_agent_pool.sandbox_template.metadata["name"])
-pulumi.export("pi_agent_sandbox_template_revision", pi_agent_sandbox_template_revision)
-pulumi.export("pi_agent_sandbox_warm_pool", pi_agent_pool.sandbox_warm_pool.metadata["name"])
-pulumi.export("pi_agent_sandbox_warm_pool_replicas", pi_agent_sandbox_warm_pool_replicas)
-pulumi.export("pi_agent_image_version", pi_agent_image_version)
+# Flat stack output names; `pulumi stack output <name>` keeps working.
+# Settings are known at program start; resource outputs resolve as resources apply.
+setting_outputs = {
+    "project_id": project_id,
+    "region": region,
+    "agent_sandbox_version": agent_sandbox_version,
+    "snapshot_folder": snapshot_folder,
+    "sandbox_template_revision": sandbox_template_revision,
+    "sandbox_warm_pool_replicas": sandbox_warm_pool_replicas,
+    "pi_agent_sandbox_template_revision": pi_agent_sandbox_template_revision,
+    "pi_agent_sandbox_warm_pool_replicas": pi_agent_sandbox_warm_pool_replicas,
+    "pi_agent_image_version": pi_agent_image_version,
+}
+resource_outputs = {
+    "cluster_name": cluster_result.cluster.name,
+    "system_node_pool_name": cluster_result.system_node_pool.name,
+    "sandbox_node_pool_name": cluster_result.node_pool.name,
+    "snapshots_bucket_name": controller.snapshots_bucket.name,
+    "snapshot_namespace": controller.snapshot_ns.metadata["name"],
+    "snapshot_ksa_name": controller.snapshot_ksa.metadata["name"],
+    "sandbox_template": python_pool.sandbox_template.metadata["name"],
+    "sandbox_warm_pool": python_pool.sandbox_warm_pool.metadata["name"],
+    "fastapi_deployment": api.fastapi_deployment.metadata["name"],
+    "fastapi_service": api.fastapi_service.metadata["name"],
+    "fastapi_static_ip": api.fastapi_static_ip.address,
+    "fastapi_ingress": api.fastapi_ingress.metadata["name"],
+    "sandbox_router_deployment": router.deployment.metadata["name"],
+    "sandbox_router_service": router.service.metadata["name"],
+    "pi_agent_sandbox_template": pi_agent_pool.sandbox_template.metadata["name"],
+    "pi_agent_sandbox_warm_pool": pi_agent_pool.sandbox_warm_pool.metadata["name"],
+}
+for output_name, value in {**setting_outputs, **resource_outputs}.items():
+    pulumi.export(output_name, value)
@@ -1,17 +1,26 @@
 """GKE cluster and node pools."""
 
 from dataclasses import dataclass
+from typing import Final
 
+import pulumi
 from pulumi_gcp import container
 
+from components.helpers import child_opts, workload_pool
 
-@dataclass
+
+@dataclass(slots=True)
 class ClusterResult:
     cluster: container.Cluster
     system_node_pool: container.NodePool
     node_pool: container.NodePool
 
 
+# GKE operations queue behind each other and retry on API rate limits when the
+# rest of the stack fans out; allow well beyond their usual duration.
+_GKE_TIMEOUTS: Final = pulumi.CustomTimeouts(create="60m", update="60m", delete="60m")
+
+
 def create_cluster(
     *,
     project_id: str,
@@ -36,7 +45,7 @@ def create_cluster(
             ),
         ),
         workload_identity_config=container.ClusterWorkloadIdentityConfigArgs(
-            workload_pool=f"{project_id}.svc.id.goog",
+            workload_pool=workload_pool(project_id),
         ),
         maintenance_policy=container.ClusterMaintenancePolicyArgs(
             recurring_window=container.ClusterMaintenancePolicyRecurringWindowArgs(
@@ -45,6 +54,7 @@ def create_cluster(
                 recurrence="FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
             ),
         ),
+        opts=pulumi.ResourceOptions(custom_timeouts=_GKE_TIMEOUTS),
     )
 
     system_node_pool = container.NodePool(
@@ -63,6 +73,7 @@ def create_cluster(
                 mode="GKE_METADATA",
             ),
         ),
+        opts=child_opts(cluster, custom_timeouts=_GKE_TIMEOUTS),
     )
 
     node_pool = container.NodePool(
@@ -82,6 +93,7 @@ def create_cluster(
                 sandbox_type="gvisor",
             ),
         ),
+        opts=child_opts(cluster, custom_timeouts=_GKE_TIMEOUTS),
     )
 
     return ClusterResult(
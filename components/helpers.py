@@ -1,20 +1,74 @@
 """Shared helper functions for the Pulumi program."""
 
+import functools
 import os
-from typing import Any
+import shutil
+import tempfile
+import urllib.request
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any, Final, TypedDict
 
+import pulumi
+from dotenv import dotenv_values
 
-def required_env(name: str) -> str:
-    """Return the value of a required environment variable, or raise."""
-    value = os.getenv(name)
+
+@functools.cache
+def load_env(dotenv_path: str | None = None) -> dict[str, str]:
+    """Return ``.env`` values overlaid with the process environment.
+
+    The file is parsed once per process. Like ``load_dotenv()``, its entries
+    are exported to ``os.environ`` for code that reads the environment
+    directly (the manifest cache path, SDK credentials), and variables
+    already set in the environment take precedence over them.
+    """
+    for key, value in dotenv_values(dotenv_path).items():
+        if value is not None:
+            os.environ.setdefault(key, value)
+    return dict(os.environ)
+
+
+def config_key(env_name: str) -> str:
+    """Return the camelCase stack config key for an env var, e.g. ``gkeVersion``."""
+    first, *rest = env_name.lower().split("_")
+    return first + "".join(part.capitalize() for part in rest)
+
+
+def stack_config_overrides(config: pulumi.Config, names: Iterable[str]) -> dict[str, str]:
+    """Return the *names* that are set in stack *config*, keyed by env var name."""
+    overrides = {}
+    for name in names:
+        value = config.get(config_key(name))
+        if value is not None:
+            overrides[name] = value
+    return overrides
+
+
+def required_env(name: str, env: Mapping[str, str] = os.environ) -> str:
+    """Return the value of a required environment variable, or raise.
+
+    *env* defaults to the live process environment; pass a snapshot (e.g.
+    ``os.environ.copy()``) to read many variables without going back through
+    ``os.environ`` for each one.
+    """
+    value = env.get(name)
     if not value:
         raise ValueError(f"Missing required environment variable: {name}")
     return value
 
 
-def int_env(name: str, default: int) -> int:
+def required_envs(names: Iterable[str], env: Mapping[str, str] = os.environ) -> dict[str, str]:
+    """Return the values of several required variables, reporting every missing one."""
+    values = {name: env.get(name) for name in names}
+    missing = [name for name, value in values.items() if not value]
+    if missing:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+    return values
+
+
+def int_env(name: str, default: int, env: Mapping[str, str] = os.environ) -> int:
     """Return an integer environment variable, or *default* if unset."""
-    value = os.getenv(name)
+    value = env.get(name)
     if value is None:
         return default
     try:
@@ -23,23 +77,122 @@ def int_env(name: str, default: int) -> int:
         raise ValueError(f"{name} must be an integer, got: {value}") from exc
 
 
-def service_external_ip(status: Any) -> str | None:
-    """Extract the first external IP from a Kubernetes Service status."""
-    if status is None:
-        return None
+def int_envs(defaults: Mapping[str, int], env: Mapping[str, str] = os.environ) -> dict[str, int]:
+    """Like :func:`int_env` for several variables, reporting every invalid one."""
+    values: dict[str, int] = {}
+    invalid = []
+    for name, default in defaults.items():
+        value = env.get(name)
+        if value is None:
+            values[name] = default
+            continue
+        try:
+            values[name] = int(value)
+        except ValueError:
+            invalid.append(f"{name}={value!r}")
+    if invalid:
+        raise ValueError(f"Environment variables must be integers: {', '.join(invalid)}")
+    return values
 
-    if isinstance(status, dict):
-        ingress = status.get("load_balancer", {}).get("ingress", [])
-        if ingress:
-            first = ingress[0]
-            if isinstance(first, dict):
-                return first.get("ip")
-        return None
 
-    load_balancer = getattr(status, "load_balancer", None)
-    if not load_balancer:
+_TRUE_VALUES: Final = frozenset({"1", "true", "yes", "on"})
+_FALSE_VALUES: Final = frozenset({"", "0", "false", "no", "off"})
+
+
+def bool_env(name: str, env: Mapping[str, str] = os.environ) -> bool:
+    """Return a boolean environment variable; unset or empty means False."""
+    value = env.get(name, "")
+    if value.lower() in _TRUE_VALUES:
+        return True
+    if value.lower() in _FALSE_VALUES:
+        return False
+    raise ValueError(f"{name} must be a boolean (1/0, true/false, yes/no, on/off), got: {value}")
+
+
+def workload_pool(project_id: str) -> str:
+    """Return the GKE workload identity pool name for *project_id*."""
+    return f"{project_id}.svc.id.goog"
+
+
+def cached_download(url: str, relative_path: str) -> str:
+    """Download *url* into the user cache once and return the local file path.
+
+    The cache lives under ``$XDG_CACHE_HOME`` (default ``~/.cache``). Only use
+    this for immutable content, e.g. release assets whose version is part of
+    *relative_path*, since an existing file is never refreshed.
+    """
+    cache_root = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+    path = cache_root / relative_path
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as tmp, urllib.request.urlopen(url) as response:
+                shutil.copyfileobj(response, tmp)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+    return str(path)
+
+
+def child_opts(parent: pulumi.Resource, **kwargs: Any) -> pulumi.ResourceOptions:
+    """Return ResourceOptions that nest a resource under *parent*.
+
+    The root-stack alias keeps resources that were created before they had a
+    parent from being replaced when they are moved under one.
+    """
+    return pulumi.ResourceOptions(
+        parent=parent,
+        aliases=[pulumi.Alias(parent=pulumi.ROOT_STACK_RESOURCE)],
+        **kwargs,
+    )
+
+
+def stack_labels_transformation(
+    args: pulumi.ResourceTransformationArgs,
+) -> pulumi.ResourceTransformationResult | None:
+    """Stack transformation labelling every Kubernetes object with its stack.
+
+    Only plain-dict ``metadata`` is touched, and a new dict is built rather
+    than mutating one that may be shared between resources. ``kubernetes:yaml``
+    components are skipped; their child objects are labelled individually.
+    """
+    if not args.type_.startswith("kubernetes:") or args.type_.startswith("kubernetes:yaml:"):
+        return None
+    metadata = args.props.get("metadata")
+    if not isinstance(metadata, dict):
         return None
-    ingress = getattr(load_balancer, "ingress", None) or []
-    if not ingress:
+    labels = {**(metadata.get("labels") or {}), "stack": pulumi.get_stack()}
+    props = {**args.props, "metadata": {**metadata, "labels": labels}}
+    return pulumi.ResourceTransformationResult(props, args.opts)
+
+
+class LoadBalancerIngress(TypedDict, total=False):
+    ip: str
+    hostname: str
+
+
+class LoadBalancerStatus(TypedDict, total=False):
+    ingress: list[LoadBalancerIngress]
+
+
+class ServiceStatus(TypedDict, total=False):
+    """Dict shape of a Service ``status`` as delivered by the provider."""
+
+    load_balancer: LoadBalancerStatus
+
+
+def service_external_ip(status: ServiceStatus | Any) -> str | None:
+    """Extract the first external IP from a Kubernetes Service status."""
+    # Provider statuses are dicts; try that shape first and only fall back to
+    # attribute access for object-style statuses.
+    try:
+        return status["load_balancer"]["ingress"][0]["ip"]
+    except (KeyError, IndexError, TypeError):
+        pass
+
+    try:
+        return status.load_balancer.ingress[0].ip
+    except (AttributeError, IndexError, TypeError):
         return None
-    return getattr(ingress[0], "ip", None)
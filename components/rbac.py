@@ -0,0 +1,65 @@
+"""Namespaced RBAC: a Role and the RoleBinding granting it to one service account."""
+
+from dataclasses import dataclass
+from typing import Any
+
+import pulumi
+import pulumi_kubernetes as kubernetes
+
+from components.helpers import child_opts
+
+
+@dataclass(slots=True)
+class RoleGrantResult:
+    role: kubernetes.rbac.v1.Role
+    role_binding: kubernetes.rbac.v1.RoleBinding
+
+
+def create_role_grant(
+    *,
+    name: str,
+    role_name: pulumi.Input[str],
+    binding_name: pulumi.Input[str],
+    namespace: pulumi.Input[str],
+    rules: list[dict[str, Any]],
+    service_account_name: pulumi.Input[str],
+    service_account_namespace: pulumi.Input[str],
+    parent: pulumi.Resource | None = None,
+) -> RoleGrantResult:
+    """Create Role ``{name}-role`` with *rules* and bind it as ``{name}-rolebinding``."""
+
+    def opts() -> pulumi.ResourceOptions | None:
+        return child_opts(parent) if parent is not None else None
+
+    role = kubernetes.rbac.v1.Role(
+        f"{name}-role",
+        metadata={
+            "name": role_name,
+            "namespace": namespace,
+        },
+        rules=rules,
+        opts=opts(),
+    )
+
+    role_binding = kubernetes.rbac.v1.RoleBinding(
+        f"{name}-rolebinding",
+        metadata={
+            "name": binding_name,
+            "namespace": namespace,
+        },
+        role_ref={
+            "apiGroup": "rbac.authorization.k8s.io",
+            "kind": "Role",
+            "name": role.metadata["name"],
+        },
+        subjects=[
+            {
+                "kind": "ServiceAccount",
+                "name": service_account_name,
+                "namespace": service_account_namespace,
+            }
+        ],
+        opts=opts(),
+    )
+
+    return RoleGrantResult(role=role, role_binding=role_binding)
@@ -0,0 +1,24 @@
+"""IAM role and Kubernetes API group names shared across components."""
+
+from typing import Final
+
+
+class Roles:
+    """Predefined GCP IAM roles granted by this stack."""
+
+    AIPLATFORM_USER: Final = "roles/aiplatform.user"
+    ARTIFACT_REGISTRY_WRITER: Final = "roles/artifactregistry.writer"
+    CLOUDSQL_CLIENT: Final = "roles/cloudsql.client"
+    CONTAINER_CLUSTER_VIEWER: Final = "roles/container.clusterViewer"
+    CONTAINER_DEVELOPER: Final = "roles/container.developer"
+    IAM_SERVICE_ACCOUNT_TOKEN_CREATOR: Final = "roles/iam.serviceAccountTokenCreator"
+    IAM_SERVICE_ACCOUNT_USER: Final = "roles/iam.serviceAccountUser"
+    LOGGING_LOG_WRITER: Final = "roles/logging.logWriter"
+    STORAGE_ADMIN: Final = "roles/storage.admin"
+    STORAGE_BUCKET_VIEWER: Final = "roles/storage.bucketViewer"
+    STORAGE_OBJECT_USER: Final = "roles/storage.objectUser"
+
+
+# API groups served by the agent-sandbox controller and its extensions.
+AGENTS_API_GROUP: Final = "agents.x-k8s.io"
+AGENTS_EXTENSIONS_API_GROUP: Final = "extensions.agents.x-k8s.io"
@@ -1,13 +1,48 @@
 """Agent-sandbox controller: CRDs, snapshot infrastructure, GCS bucket, and IAM."""
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import Final
 
 import pulumi
-from pulumi_gcp import container, organizations, projects, storage
+from pulumi_gcp import container, projects, storage
 import pulumi_kubernetes as kubernetes
 
+from components.helpers import cached_download, child_opts, workload_pool
+from components.roles import Roles
 
-@dataclass
+AGENT_SANDBOX_RELEASE_URL: Final = "https://github.com/kubernetes-sigs/agent-sandbox/releases/download/{version}/{name}"
+
+# Object access the pod snapshot controller needs under the snapshot folder.
+POD_SNAPSHOT_GCS_PERMISSIONS: Final = (
+    "storage.objects.get",
+    "storage.objects.create",
+    "storage.objects.delete",
+    "storage.folders.create",
+)
+
+
+def _agent_sandbox_release_file(version: str, name: str) -> str:
+    """Return a local copy of an agent-sandbox release asset (fetched once per version)."""
+    return cached_download(
+        AGENT_SANDBOX_RELEASE_URL.format(version=version, name=name),
+        f"agent-sandbox/{version}/{name}",
+    )
+
+
+def _agent_sandbox_release_files(version: str, *names: str, skip_cache: bool = False) -> list[str]:
+    """Like :func:`_agent_sandbox_release_file` for several assets, fetched concurrently.
+
+    With *skip_cache*, return the release URLs instead so ConfigFile fetches
+    them itself and nothing is written to disk.
+    """
+    if skip_cache:
+        return [AGENT_SANDBOX_RELEASE_URL.format(version=version, name=name) for name in names]
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        return list(pool.map(lambda name: _agent_sandbox_release_file(version, name), names))
+
+
+@dataclass(slots=True)
 class SandboxControllerResult:
     snapshot_ns: kubernetes.core.v1.Namespace
     snapshot_ksa: kubernetes.core.v1.ServiceAccount
@@ -19,6 +54,7 @@ class SandboxControllerResult:
 def create_sandbox_controller(
     *,
     project_id: str,
+    project_number: str,
     region: str,
     snapshots_bucket_name: str,
     snapshot_folder: str,
@@ -26,7 +62,13 @@ def create_sandbox_controller(
     snapshot_ksa_name: str,
     agent_sandbox_version: str,
     node_pool: container.NodePool,
+    skip_manifest_cache: bool = False,
 ) -> SandboxControllerResult:
+    # Managed folder names must end with exactly one slash.
+    snapshot_folder_name = f"{snapshot_folder.rstrip('/')}/"
+    # Both principals share the workload identity pool path.
+    workload_identity_pool = f"iam.googleapis.com/projects/{project_number}/locations/global/workloadIdentityPools/{workload_pool(project_id)}"
+
     # ── GCS bucket for snapshots ──────────────────────────────────────────
     snapshots_bucket = storage.Bucket(
         "snapshots-bucket",
@@ -44,7 +86,8 @@ def create_sandbox_controller(
     snapshots_managed_folder = storage.ManagedFolder(
         "snapshots-managed-folder",
         bucket=snapshots_bucket.name,
-        name=f"{snapshot_folder.rstrip('/')}/",
+        name=snapshot_folder_name,
+        opts=child_opts(snapshots_bucket),
     )
 
     pod_snapshot_gcs_read_writer_role = projects.IAMCustomRole(
@@ -52,12 +95,7 @@ def create_sandbox_controller(
         project=project_id,
         role_id="podSnapshotGcsReadWriter",
         title="podSnapshotGcsReadWriter",
-        permissions=[
-            "storage.objects.get",
-            "storage.objects.create",
-            "storage.objects.delete",
-            "storage.folders.create",
-        ],
+        permissions=list(POD_SNAPSHOT_GCS_PERMISSIONS),
     )
 
     # ── Kubernetes namespace & service account ────────────────────────────
@@ -65,73 +103,58 @@ def create_sandbox_controller(
         "snapshot-namespace",
         metadata={"name": snapshot_namespace},
     )
+    snapshot_ns_name = snapshot_ns.metadata["name"]
 
     snapshot_ksa = kubernetes.core.v1.ServiceAccount(
         "snapshot-ksa",
         metadata={
             "name": snapshot_ksa_name,
-            "namespace": snapshot_ns.metadata["name"],
+            "namespace": snapshot_ns_name,
         },
-        opts=pulumi.ResourceOptions(depends_on=[snapshot_ns]),
+        opts=child_opts(snapshot_ns),
     )
 
     # ── IAM bindings ──────────────────────────────────────────────────────
-    project = organizations.get_project_output(project_id=project_id)
-    namespace_principal_set = pulumi.Output.format(
-        "principalSet://iam.googleapis.com/projects/{0}/locations/global/workloadIdentityPools/{1}.svc.id.goog/namespace/{2}",
-        project.number,
-        project_id,
-        snapshot_ns.metadata["name"],
-    )
-
-    bucket_viewer_for_namespace = storage.BucketIAMMember(
-        "snapshot-namespace-bucket-viewer",
-        bucket=snapshots_bucket.name,
-        member=namespace_principal_set,
-        role="roles/storage.bucketViewer",
-    )
-
-    snapshot_ksa_principal = pulumi.Output.format(
-        "principal://iam.googleapis.com/projects/{0}/locations/global/workloadIdentityPools/{1}.svc.id.goog/subject/ns/{2}/sa/{3}",
-        project.number,
-        project_id,
-        snapshot_ns.metadata["name"],
-        snapshot_ksa.metadata["name"],
-    )
-
-    bucket_writer_for_snapshot_ksa = storage.BucketIAMMember(
-        "snapshot-ksa-folder-writer",
-        bucket=snapshots_bucket.name,
-        member=snapshot_ksa_principal,
-        role=pod_snapshot_gcs_read_writer_role.name,
-    )
-
-    bucket_object_user_for_snapshot_ksa = storage.BucketIAMMember(
-        "snapshot-ksa-object-user",
-        bucket=snapshots_bucket.name,
-        member=snapshot_ksa_principal,
-        role="roles/storage.objectUser",
-    )
-
-    vertex_ai_user_for_snapshot_ksa = projects.IAMMember(
+    # Both workload identity principals come from one resolution of the
+    # namespace name; the KSA name is plain configuration.
+    snapshot_principals = snapshot_ns_name.apply(
+        lambda namespace: {
+            "namespace": f"principalSet://{workload_identity_pool}/namespace/{namespace}",
+            "ksa": f"principal://{workload_identity_pool}/subject/ns/{namespace}/sa/{snapshot_ksa_name}",
+        }
+    )
+    namespace_principal_set = snapshot_principals["namespace"]
+    snapshot_ksa_principal = snapshot_principals["ksa"]
+
+    gke_snapshot_controller_service_agent = (
+        f"serviceAccount:service-{project_number}@container-engine-robot.iam.gserviceaccount.com"
+    )
+
+    # (resource name, member, role) for every grant on the snapshots bucket.
+    snapshot_bucket_grants = [
+        ("snapshot-namespace-bucket-viewer", namespace_principal_set, Roles.STORAGE_BUCKET_VIEWER),
+        ("snapshot-ksa-folder-writer", snapshot_ksa_principal, pod_snapshot_gcs_read_writer_role.name),
+        ("snapshot-ksa-object-user", snapshot_ksa_principal, Roles.STORAGE_OBJECT_USER),
+        ("gke-snapshot-controller-object-user", gke_snapshot_controller_service_agent, Roles.STORAGE_OBJECT_USER),
+    ]
+    snapshot_bucket_members = [
+        storage.BucketIAMMember(
+            name,
+            bucket=snapshots_bucket.name,
+            member=member,
+            role=role,
+            opts=child_opts(snapshots_bucket),
+        )
+        for name, member, role in snapshot_bucket_grants
+    ]
+
+    projects.IAMMember(
         "snapshot-ksa-vertex-ai-user",
         project=project_id,
-        role="roles/aiplatform.user",
+        role=Roles.AIPLATFORM_USER,
         member=snapshot_ksa_principal,
     )
 
-    gke_snapshot_controller_service_agent = pulumi.Output.format(
-        "serviceAccount:service-{0}@container-engine-robot.iam.gserviceaccount.com",
-        project.number,
-    )
-
-    bucket_object_user_for_gke_snapshot_controller = storage.BucketIAMMember(
-        "gke-snapshot-controller-object-user",
-        bucket=snapshots_bucket.name,
-        member=gke_snapshot_controller_service_agent,
-        role="roles/storage.objectUser",
-    )
-
     # ── Agent-sandbox CRDs ────────────────────────────────────────────────
     agent_sandbox_system_ns = kubernetes.core.v1.Namespace(
         "agent-sandbox-system-namespace",
@@ -139,20 +162,23 @@ def create_sandbox_controller(
         opts=pulumi.ResourceOptions(depends_on=[node_pool]),
     )
 
+    # Cold-cache downloads overlap; the ConfigFiles still apply in order.
+    manifest_file, extensions_file = _agent_sandbox_release_files(
+        agent_sandbox_version, "manifest.yaml", "extensions.yaml", skip_cache=skip_manifest_cache
+    )
+
     agent_sandbox_manifest = kubernetes.yaml.ConfigFile(
         "agent-sandbox-manifest",
-        file=f"https://github.com/kubernetes-sigs/agent-sandbox/releases/download/{agent_sandbox_version}/manifest.yaml",
+        file=manifest_file,
         resource_prefix="agent-sandbox-manifest",
         opts=pulumi.ResourceOptions(depends_on=[agent_sandbox_system_ns]),
     )
 
     agent_sandbox_extensions = kubernetes.yaml.ConfigFile(
         "agent-sandbox-extensions",
-        file=f"https://github.com/kubernetes-sigs/agent-sandbox/releases/download/{agent_sandbox_version}/extensions.yaml",
+        file=extensions_file,
         resource_prefix="agent-sandbox-extensions",
-        opts=pulumi.ResourceOptions(
-            depends_on=[agent_sandbox_system_ns, agent_sandbox_manifest]
-        ),
+        opts=pulumi.ResourceOptions(depends_on=[agent_sandbox_manifest]),
     )
 
     # ── Pod snapshot storage config ───────────────────────────────────────
@@ -173,10 +199,7 @@ def create_sandbox_controller(
             depends_on=[
                 agent_sandbox_extensions,
                 snapshots_managed_folder,
-                bucket_viewer_for_namespace,
-                bucket_writer_for_snapshot_ksa,
-                bucket_object_user_for_snapshot_ksa,
-                bucket_object_user_for_gke_snapshot_controller,
+                *snapshot_bucket_members,
             ]
         ),
     )
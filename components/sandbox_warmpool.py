@@ -0,0 +1,154 @@
+"""Shared SandboxTemplate + SandboxWarmPool construction for agent runtimes."""
+
+from typing import Any
+
+import pulumi
+import pulumi_kubernetes as kubernetes
+
+from components.helpers import child_opts
+
+
+def _pod_template_metadata() -> dict[str, Any]:
+    """Labels shared by every sandbox pod."""
+    return {"labels": {"app": "agent-sandbox-workload"}}
+
+
+def agent_container_resources() -> dict[str, Any]:
+    """Requests/limits shared by the agent runtime containers."""
+    return {
+        "requests": {
+            "cpu": "250m",
+            "memory": "512Mi",
+            "ephemeral-storage": "512Mi",
+        },
+        "limits": {
+            "cpu": "1",
+            "memory": "1Gi",
+            "ephemeral-storage": "1Gi",
+        },
+    }
+
+
+def readiness_probe(port: int) -> dict[str, Any]:
+    """HTTP readiness probe on ``/`` polled every second from pod start."""
+    return {
+        "httpGet": {"path": "/", "port": port},
+        "initialDelaySeconds": 0,
+        "periodSeconds": 1,
+    }
+
+
+class SandboxWarmPool(pulumi.ComponentResource):
+    """A gVisor SandboxTemplate running *containers* and a warm pool for it.
+
+    Every agent runtime shares the same pod shell (snapshot KSA, no token
+    automount, gVisor runtime class); only the containers and volumes differ.
+    """
+
+    sandbox_template: kubernetes.apiextensions.CustomResource
+    sandbox_warm_pool: kubernetes.apiextensions.CustomResource
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        template_name: str,
+        warm_pool_name: str,
+        snapshot_ns: kubernetes.core.v1.Namespace,
+        snapshot_ksa: kubernetes.core.v1.ServiceAccount,
+        agent_sandbox_extensions: kubernetes.yaml.ConfigFile,
+        pod_snapshot_storage_config: kubernetes.apiextensions.CustomResource,
+        template_revision: str,
+        warm_pool_replicas: int,
+        containers: list[dict[str, Any]],
+        volumes: list[dict[str, Any]] | None = None,
+        opts: pulumi.ResourceOptions | None = None,
+    ) -> None:
+        super().__init__("agent-workspace:sandbox:WarmPool", name, None, opts)
+
+        snapshot_ns_name = snapshot_ns.metadata["name"]
+        pod_spec: dict[str, Any] = {
+            "serviceAccountName": snapshot_ksa.metadata["name"],
+            "automountServiceAccountToken": False,
+            "runtimeClassName": "gvisor",
+            "containers": containers,
+            "restartPolicy": "OnFailure",
+        }
+        if volumes:
+            pod_spec["volumes"] = volumes
+
+        self.sandbox_template = kubernetes.apiextensions.CustomResource(
+            template_name,
+            api_version="extensions.agents.x-k8s.io/v1alpha1",
+            kind="SandboxTemplate",
+            metadata={
+                "name": template_name,
+                "namespace": snapshot_ns_name,
+                "annotations": {
+                    "funky.dev/template-revision": template_revision,
+                },
+            },
+            spec={
+                "podTemplate": {
+                    "metadata": _pod_template_metadata(),
+                    "spec": pod_spec,
+                },
+            },
+            # The KSA dependency is implied by serviceAccountName; the CRDs and
+            # snapshot storage are not referenced by any input.
+            opts=child_opts(
+                self,
+                depends_on=[agent_sandbox_extensions, pod_snapshot_storage_config],
+            ),
+        )
+
+        self.sandbox_warm_pool = kubernetes.apiextensions.CustomResource(
+            warm_pool_name,
+            api_version="extensions.agents.x-k8s.io/v1alpha1",
+            kind="SandboxWarmPool",
+            metadata={
+                "name": warm_pool_name,
+                "namespace": snapshot_ns_name,
+            },
+            spec={
+                "replicas": warm_pool_replicas,
+                "sandboxTemplateRef": {
+                    "name": self.sandbox_template.metadata["name"],
+                },
+            },
+            opts=child_opts(self),
+        )
+
+        self.register_outputs({
+            "sandbox_template": self.sandbox_template.metadata["name"],
+            "sandbox_warm_pool": self.sandbox_warm_pool.metadata["name"],
+        })
+
+
+def create_sandbox_warmpool(
+    *,
+    template_name: str,
+    warm_pool_name: str,
+    snapshot_ns: kubernetes.core.v1.Namespace,
+    snapshot_ksa: kubernetes.core.v1.ServiceAccount,
+    agent_sandbox_extensions: kubernetes.yaml.ConfigFile,
+    pod_snapshot_storage_config: kubernetes.apiextensions.CustomResource,
+    template_revision: str,
+    warm_pool_replicas: int,
+    containers: list[dict[str, Any]],
+    volumes: list[dict[str, Any]] | None = None,
+) -> SandboxWarmPool:
+    """Create a :class:`SandboxWarmPool` named after its warm pool."""
+    return SandboxWarmPool(
+        warm_pool_name,
+        template_name=template_name,
+        warm_pool_name=warm_pool_name,
+        snapshot_ns=snapshot_ns,
+        snapshot_ksa=snapshot_ksa,
+        agent_sandbox_extensions=agent_sandbox_extensions,
+        pod_snapshot_storage_config=pod_snapshot_storage_config,
+        template_revision=template_revision,
+        warm_pool_replicas=warm_pool_replicas,
+        containers=containers,
+        volumes=volumes,
+    )
@@ -1,13 +1,28 @@
 """Workspace API: FastAPI deployment, ingress, certs, and Cloud Build CI/CD."""
 
 from dataclasses import dataclass
+from typing import Final
 
 import pulumi
-from pulumi_gcp import cloudbuild, compute, container, organizations, projects, serviceaccount
+from pulumi_gcp import cloudbuild, compute, container, projects, serviceaccount
 import pulumi_kubernetes as kubernetes
 
+from components.helpers import child_opts, workload_pool
+from components.rbac import create_role_grant
+from components.roles import AGENTS_API_GROUP, AGENTS_EXTENSIONS_API_GROUP, Roles
 
-@dataclass
+
+# Project roles the Cloud Build SA needs to build, push and deploy the API.
+CLOUDBUILD_PROJECT_ROLES: Final = (
+    ("cloudbuild-gke-developer", Roles.CONTAINER_DEVELOPER),
+    ("cloudbuild-gke-viewer", Roles.CONTAINER_CLUSTER_VIEWER),
+    ("cloudbuild-storage-admin", Roles.STORAGE_ADMIN),
+    ("cloudbuild-artifact-registry-writer", Roles.ARTIFACT_REGISTRY_WRITER),
+    ("cloudbuild-logging-writer", Roles.LOGGING_LOG_WRITER),
+)
+
+
+@dataclass(slots=True)
 class WorkspaceApiResult:
     workloads_ns: kubernetes.core.v1.Namespace
     fastapi_deployment: kubernetes.apps.v1.Deployment
@@ -19,6 +34,7 @@ class WorkspaceApiResult:
 def create_workspace_api(
     *,
     project_id: str,
+    project_number: str,
     region: str,
     snapshot_ns: kubernetes.core.v1.Namespace,
     system_node_pool: container.NodePool,
@@ -33,25 +49,24 @@ def create_workspace_api(
     cloudbuild_repository: str,
 ) -> WorkspaceApiResult:
     fastapi_labels = {"app": fastapi_app_name}
+    snapshot_ns_name = snapshot_ns.metadata["name"]
 
     # ── Namespace ─────────────────────────────────────────────────────────
     workloads_ns = kubernetes.core.v1.Namespace(
         "workloads-namespace",
         metadata={"name": workloads_namespace},
     )
+    workloads_ns_name = workloads_ns.metadata["name"]
 
     # ── Secret (placeholder – actual values managed out-of-band) ──────────
     agent_workspace_secret = kubernetes.core.v1.Secret(
         "agent-workspace-secrets",
         metadata={
             "name": "agent-workspace-secrets",
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
         },
         string_data={},
-        opts=pulumi.ResourceOptions(
-            depends_on=[workloads_ns],
-            ignore_changes=["stringData", "data"],
-        ),
+        opts=pulumi.ResourceOptions(ignore_changes=["stringData", "data"]),
     )
 
     # ── Service account + IAM ─────────────────────────────────────────────
@@ -59,42 +74,39 @@ def create_workspace_api(
         "fastapi-ksa",
         metadata={
             "name": f"{fastapi_app_name}-sa",
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
         },
-        opts=pulumi.ResourceOptions(depends_on=[workloads_ns]),
     )
+    fastapi_ksa_name = fastapi_ksa.metadata["name"]
 
-    project = organizations.get_project_output(project_id=project_id)
-    fastapi_ksa_principal = pulumi.Output.format(
-        "principal://iam.googleapis.com/projects/{0}/locations/global/workloadIdentityPools/{1}.svc.id.goog/subject/ns/{2}/sa/{3}",
-        project.number,
-        project_id,
-        workloads_ns.metadata["name"],
-        fastapi_ksa.metadata["name"],
+    # project_number and the pool are plain strings captured by the closure;
+    # only the namespace and KSA names need resolving.
+    fastapi_ksa_pool = f"iam.googleapis.com/projects/{project_number}/locations/global/workloadIdentityPools/{workload_pool(project_id)}"
+    fastapi_ksa_principal = pulumi.Output.all(workloads_ns_name, fastapi_ksa_name).apply(
+        lambda names: f"principal://{fastapi_ksa_pool}/subject/ns/{names[0]}/sa/{names[1]}"
     )
 
     fastapi_cloudsql_client = projects.IAMMember(
         "fastapi-ksa-cloudsql-client",
         project=project_id,
-        role="roles/cloudsql.client",
+        role=Roles.CLOUDSQL_CLIENT,
         member=fastapi_ksa_principal,
     )
 
     # ── RBAC for sandbox claims ───────────────────────────────────────────
-    fastapi_sandboxclaims_role = kubernetes.rbac.v1.Role(
-        "fastapi-sandboxclaims-role",
-        metadata={
-            "name": f"{fastapi_app_name}-sandboxclaims-role",
-            "namespace": snapshot_ns.metadata["name"],
-        },
+    fastapi_sandboxclaims_grant = create_role_grant(
+        name="fastapi-sandboxclaims",
+        role_name=f"{fastapi_app_name}-sandboxclaims-role",
+        binding_name=f"{fastapi_app_name}-sandboxclaims-rb",
+        namespace=snapshot_ns_name,
         rules=[
             {
-                "apiGroups": ["extensions.agents.x-k8s.io"],
+                "apiGroups": [AGENTS_EXTENSIONS_API_GROUP],
                 "resources": ["sandboxclaims", "sandboxtemplates"],
                 "verbs": ["create", "get", "list", "watch", "update", "patch", "delete"],
             },
             {
-                "apiGroups": ["agents.x-k8s.io"],
+                "apiGroups": [AGENTS_API_GROUP],
                 "resources": ["sandboxclaims", "sandboxes", "sandboxtemplates"],
                 "verbs": ["create", "get", "list", "watch", "update", "patch", "delete"],
             },
@@ -119,28 +131,8 @@ def create_workspace_api(
                 "verbs": ["create", "get"],
             },
         ],
-        opts=pulumi.ResourceOptions(depends_on=[snapshot_ns]),
-    )
-
-    fastapi_sandboxclaims_rolebinding = kubernetes.rbac.v1.RoleBinding(
-        "fastapi-sandboxclaims-rolebinding",
-        metadata={
-            "name": f"{fastapi_app_name}-sandboxclaims-rb",
-            "namespace": snapshot_ns.metadata["name"],
-        },
-        role_ref={
-            "apiGroup": "rbac.authorization.k8s.io",
-            "kind": "Role",
-            "name": fastapi_sandboxclaims_role.metadata["name"],
-        },
-        subjects=[
-            {
-                "kind": "ServiceAccount",
-                "name": fastapi_ksa.metadata["name"],
-                "namespace": workloads_ns.metadata["name"],
-            }
-        ],
-        opts=pulumi.ResourceOptions(depends_on=[fastapi_ksa, fastapi_sandboxclaims_role]),
+        service_account_name=fastapi_ksa_name,
+        service_account_namespace=workloads_ns_name,
     )
 
     # ── Deployment ────────────────────────────────────────────────────────
@@ -148,7 +140,7 @@ def create_workspace_api(
         "fastapi-deployment",
         metadata={
             "name": fastapi_app_name,
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
             "labels": fastapi_labels,
             "annotations": {
                 "pulumi.com/skipAwait": "true",
@@ -160,7 +152,7 @@ def create_workspace_api(
             "template": {
                 "metadata": {"labels": fastapi_labels},
                 "spec": {
-                    "serviceAccountName": fastapi_ksa.metadata["name"],
+                    "serviceAccountName": fastapi_ksa_name,
                     "nodeSelector": {"cloud.google.com/gke-nodepool": "system-node-pool"},
                     "containers": [
                         {
@@ -192,7 +184,7 @@ def create_workspace_api(
             },
         },
         opts=pulumi.ResourceOptions(
-            depends_on=[system_node_pool, fastapi_ksa, fastapi_sandboxclaims_rolebinding, agent_workspace_secret],
+            depends_on=[system_node_pool, fastapi_sandboxclaims_grant.role_binding, agent_workspace_secret],
             ignore_changes=["spec.template.spec.containers[*].image"],
         ),
     )
@@ -204,19 +196,18 @@ def create_workspace_api(
         kind="BackendConfig",
         metadata={
             "name": f"{fastapi_app_name}-backend-config",
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
         },
         spec={
             "timeoutSec": 3600,
         },
-        opts=pulumi.ResourceOptions(depends_on=[workloads_ns]),
     )
 
     fastapi_service = kubernetes.core.v1.Service(
         "fastapi-service",
         metadata={
             "name": fastapi_app_name,
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
             "labels": fastapi_labels,
             "annotations": {
                 "cloud.google.com/backend-config": f'{{"default": "{fastapi_app_name}-backend-config"}}',
@@ -242,7 +233,7 @@ def create_workspace_api(
         kind="ManagedCertificate",
         metadata={
             "name": "agent-workspace-api-cert",
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
         },
         spec={"domains": ["api.funky.dev"]},
     )
@@ -253,24 +244,26 @@ def create_workspace_api(
         kind="FrontendConfig",
         metadata={
             "name": f"{fastapi_app_name}-frontend-config",
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
         },
         spec={
             "redirectToHttps": {"enabled": True},
         },
-        opts=pulumi.ResourceOptions(depends_on=[workloads_ns]),
     )
 
     fastapi_ingress = kubernetes.networking.v1.Ingress(
         "fastapi-ingress",
         metadata={
             "name": fastapi_app_name,
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
             "annotations": {
                 "kubernetes.io/ingress.global-static-ip-name": "agent-workspace-api-ip",
                 "networking.gke.io/managed-certificates": "agent-workspace-api-cert",
                 "kubernetes.io/ingress.class": "gce",
                 "networking.gke.io/v1beta1.FrontendConfig": f"{fastapi_app_name}-frontend-config",
+                # GCE load balancer provisioning takes minutes; the address is
+                # already known from the reserved static IP, so don't wait on it.
+                "pulumi.com/skipAwait": "true",
             },
         },
         spec={
@@ -288,7 +281,7 @@ def create_workspace_api(
         "fastapi-pdb",
         metadata={
             "name": f"{fastapi_app_name}-pdb",
-            "namespace": workloads_ns.metadata["name"],
+            "namespace": workloads_ns_name,
         },
         spec={
             "minAvailable": 1,
@@ -304,63 +297,40 @@ def create_workspace_api(
         display_name="Agent Workspace Cloud Build",
         project=project_id,
     )
-    cloud_build_member = cloud_build_sa.email.apply(
-        lambda email: f"serviceAccount:{email}"
-    )
+    cloud_build_member = cloud_build_sa.email.apply("serviceAccount:{0}".format)
     cloud_build_service_account = cloud_build_sa.email.apply(
-        lambda email: f"projects/{project_id}/serviceAccounts/{email}"
-    )
-    cloud_build_service_agent_member = project.number.apply(
-        lambda num: f"serviceAccount:service-{num}@gcp-sa-cloudbuild.iam.gserviceaccount.com"
-    )
-
-    cloudbuild_gke_developer = projects.IAMMember(
-        "cloudbuild-gke-developer",
-        project=project_id,
-        role="roles/container.developer",
-        member=cloud_build_member,
+        f"projects/{project_id}/serviceAccounts/{{0}}".format
     )
-
-    cloudbuild_gke_viewer = projects.IAMMember(
-        "cloudbuild-gke-viewer",
-        project=project_id,
-        role="roles/container.clusterViewer",
-        member=cloud_build_member,
+    cloud_build_service_agent_member = (
+        f"serviceAccount:service-{project_number}@gcp-sa-cloudbuild.iam.gserviceaccount.com"
     )
 
-    cloudbuild_storage_admin = projects.IAMMember(
-        "cloudbuild-storage-admin",
-        project=project_id,
-        role="roles/storage.admin",
-        member=cloud_build_member,
-    )
-
-    cloudbuild_artifact_registry_writer = projects.IAMMember(
-        "cloudbuild-artifact-registry-writer",
-        project=project_id,
-        role="roles/artifactregistry.writer",
-        member=cloud_build_member,
-    )
-
-    cloudbuild_logging_writer = projects.IAMMember(
-        "cloudbuild-logging-writer",
-        project=project_id,
-        role="roles/logging.logWriter",
-        member=cloud_build_member,
-    )
+    # Grants to and on the build SA are nested under it. Project-level
+    # IAMMember bindings stay non-authoritative: an IAMBinding (or a custom
+    # role unioning these predefined roles) would strip other principals.
+    for resource_name, role in CLOUDBUILD_PROJECT_ROLES:
+        projects.IAMMember(
+            resource_name,
+            project=project_id,
+            role=role,
+            member=cloud_build_member,
+            opts=child_opts(cloud_build_sa),
+        )
 
     cloudbuild_sa_user = serviceaccount.IAMMember(
         "cloudbuild-sa-user",
         service_account_id=cloud_build_sa.name,
-        role="roles/iam.serviceAccountUser",
+        role=Roles.IAM_SERVICE_ACCOUNT_USER,
         member=cloud_build_service_agent_member,
+        opts=child_opts(cloud_build_sa),
     )
 
     cloudbuild_sa_token_creator = serviceaccount.IAMMember(
         "cloudbuild-sa-token-creator",
         service_account_id=cloud_build_sa.name,
-        role="roles/iam.serviceAccountTokenCreator",
+        role=Roles.IAM_SERVICE_ACCOUNT_TOKEN_CREATOR,
         member=cloud_build_service_agent_member,
+        opts=child_opts(cloud_build_sa),
     )
 
     fastapi_cloudbuild_trigger = cloudbuild.Trigger(
@@ -377,15 +347,9 @@ def create_workspace_api(
         ),
         service_account=cloud_build_service_account,
         opts=pulumi.ResourceOptions(
-            depends_on=[
-                cloudbuild_gke_developer,
-                cloudbuild_gke_viewer,
-                cloudbuild_storage_admin,
-                cloudbuild_artifact_registry_writer,
-                cloudbuild_logging_writer,
-                cloudbuild_sa_user,
-                cloudbuild_sa_token_creator,
-            ],
+            # Only the service-account bindings gate using the SA on the
+            # trigger; project-level role grants are needed once builds run.
+            depends_on=[cloudbuild_sa_user, cloudbuild_sa_token_creator],
         ),
     )
 
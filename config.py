@@ -0,0 +1,95 @@
+"""Stack configuration, parsed once from Pulumi config, ``.env`` and the environment."""
+
+from typing import Final
+
+import pulumi
+
+from components.helpers import bool_env, int_envs, load_env, required_envs, stack_config_overrides
+
+# Required settings; all are checked up front so one run reports every missing one.
+REQUIRED_ENV: Final = (
+    "GKE_LOCATION",
+    "GKE_VERSION",
+    "CLUSTER_NAME",
+    "MACHINE_TYPE",
+    "NODE_POOL_NAME",
+    "AGENT_SANDBOX_VERSION",
+    "SNAPSHOTS_BUCKET_NAME_PREFIX",
+    "SNAPSHOT_FOLDER",
+    "SNAPSHOT_NAMESPACE",
+    "SNAPSHOT_KSA_NAME",
+    "SANDBOX_TEMPLATE_REVISION",
+    "CLAUDE_AGENT_SANDBOX_TEMPLATE_REVISION",
+    "PI_AGENT_SANDBOX_TEMPLATE_REVISION",
+    "PI_AGENT_IMAGE_VERSION",
+    "SANDBOX_ROUTER_IMAGE",
+    "WORKLOADS_NAMESPACE",
+    "FASTAPI_APP_NAME",
+    "CLOUDBUILD_FILE",
+    "CLOUDBUILD_BRANCH_NAME",
+    "CLOUDBUILD_LOCATION",
+    "CLOUDBUILD_REPOSITORY",
+)
+
+# Optional integer settings and their defaults, parsed in the same up-front pass.
+INT_ENV_DEFAULTS: Final = {
+    "SANDBOX_WARM_POOL_REPLICAS": 2,
+    "CLAUDE_AGENT_SANDBOX_WARM_POOL_REPLICAS": 2,
+    "PI_AGENT_SANDBOX_WARM_POOL_REPLICAS": 2,
+    "FASTAPI_REPLICAS": 1,
+    "FASTAPI_CONTAINER_PORT": 8080,
+    "FASTAPI_SERVICE_PORT": 80,
+    "PULUMI_PARALLEL_HINT": 32,
+}
+
+# Optional on/off switches; unset means off.
+BOOL_ENV: Final = ("PULUMI_SKIP_MANIFEST_CACHE",)
+
+# Each setting can also be set in stack config under its camelCase key (e.g.
+# ``pulumi config set gkeVersion ...``), which takes precedence over the environment.
+stack_config = pulumi.Config()
+env = {
+    **load_env(),
+    **stack_config_overrides(stack_config, (*REQUIRED_ENV, *INT_ENV_DEFAULTS, *BOOL_ENV)),
+}
+required = required_envs(REQUIRED_ENV, env)
+integers = int_envs(INT_ENV_DEFAULTS, env)
+
+gcp_config = pulumi.Config("gcp")
+project_id: Final = gcp_config.require("project")
+# The provider SDK is imported only after the settings above validate.
+from pulumi_gcp import organizations
+
+# Resolved once at load time so IAM members can be built as plain strings.
+project_number: Final = organizations.get_project(project_id=project_id).number
+region: Final = required["GKE_LOCATION"]
+min_gke_cluster_version: Final = required["GKE_VERSION"]
+cluster_name: Final = required["CLUSTER_NAME"]
+machine_type: Final = required["MACHINE_TYPE"]
+node_pool_name: Final = required["NODE_POOL_NAME"]
+agent_sandbox_version: Final = required["AGENT_SANDBOX_VERSION"]
+snapshots_bucket_name_prefix: Final = required["SNAPSHOTS_BUCKET_NAME_PREFIX"]
+snapshots_bucket_name: Final = f"{snapshots_bucket_name_prefix}{project_id}"
+snapshot_folder: Final = required["SNAPSHOT_FOLDER"]
+snapshot_namespace: Final = required["SNAPSHOT_NAMESPACE"]
+snapshot_ksa_name: Final = required["SNAPSHOT_KSA_NAME"]
+sandbox_template_revision: Final = required["SANDBOX_TEMPLATE_REVISION"]
+sandbox_warm_pool_replicas: Final = integers["SANDBOX_WARM_POOL_REPLICAS"]
+claude_agent_sandbox_template_revision: Final = required["CLAUDE_AGENT_SANDBOX_TEMPLATE_REVISION"]
+claude_agent_sandbox_warm_pool_replicas: Final = integers["CLAUDE_AGENT_SANDBOX_WARM_POOL_REPLICAS"]
+pi_agent_sandbox_template_revision: Final = required["PI_AGENT_SANDBOX_TEMPLATE_REVISION"]
+pi_agent_sandbox_warm_pool_replicas: Final = integers["PI_AGENT_SANDBOX_WARM_POOL_REPLICAS"]
+pi_agent_image_version: Final = required["PI_AGENT_IMAGE_VERSION"]
+pi_agent_gemini_api_key: Final = stack_config.require_secret("gemini-api-key")
+sandbox_router_image: Final = required["SANDBOX_ROUTER_IMAGE"]
+workloads_namespace: Final = required["WORKLOADS_NAMESPACE"]
+fastapi_app_name: Final = required["FASTAPI_APP_NAME"]
+fastapi_replicas: Final = integers["FASTAPI_REPLICAS"]
+fastapi_container_port: Final = integers["FASTAPI_CONTAINER_PORT"]
+fastapi_service_port: Final = integers["FASTAPI_SERVICE_PORT"]
+cloudbuild_file: Final = required["CLOUDBUILD_FILE"]
+cloudbuild_branch_name: Final = required["CLOUDBUILD_BRANCH_NAME"]
+cloudbuild_location: Final = required["CLOUDBUILD_LOCATION"]
+cloudbuild_repository: Final = required["CLOUDBUILD_REPOSITORY"]
+pulumi_parallel_hint: Final = integers["PULUMI_PARALLEL_HINT"]
+skip_manifest_cache: Final = bool_env("PULUMI_SKIP_MANIFEST_CACHE", env)
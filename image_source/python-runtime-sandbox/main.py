@@ -12,19 +12,49 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import subprocess
 import os
 import logging
-import urllib.parse
+import re
+import signal
+import stat
+from contextlib import asynccontextmanager
+from datetime import timezone
+from email.utils import parsedate_to_datetime
 
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
+import anyio.to_thread
+from fastapi import Depends, FastAPI, UploadFile, File, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 
 WORKSPACE_DIR = os.path.realpath(os.getenv("WORKSPACE_DIR", "/tmp/workspace"))
 RUNTIME_DIR = os.path.realpath(os.getenv("XDG_RUNTIME_DIR", "/tmp/runtime"))
 CACHE_DIR = os.path.realpath(os.getenv("XDG_CACHE_HOME", os.path.join(WORKSPACE_DIR, ".cache")))
 CONFIG_DIR = os.path.realpath(os.getenv("XDG_CONFIG_HOME", os.path.join(WORKSPACE_DIR, ".config")))
+# Environment for /execute commands, built once; the child copies it at exec.
+COMMAND_ENV = {
+    **os.environ,
+    "HOME": WORKSPACE_DIR,
+    "XDG_RUNTIME_DIR": RUNTIME_DIR,
+    "XDG_CACHE_HOME": CACHE_DIR,
+    "XDG_CONFIG_HOME": CONFIG_DIR,
+}
+WORKSPACE_PREFIX = os.path.join(WORKSPACE_DIR, "")
+# A ".." path segment; relative paths without one cannot climb lexically.
+PARENT_SEGMENT = re.compile(r"(?:^|/)\.\.(?:/|$)")
+UPLOAD_CHUNK_SIZE = 1 << 20
+UPLOAD_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW | os.O_CLOEXEC
+# Worker threads for filesystem calls, so slow storage does not cap listings.
+FILESYSTEM_THREADS = 64
+# Optional wall-clock limit for /execute commands; unset means no limit.
+EXECUTE_TIMEOUT = float(os.environ["EXECUTE_TIMEOUT_SECONDS"]) if os.getenv("EXECUTE_TIMEOUT_SECONDS") else None
+# How long a killed command may take to release its pipes before they are closed.
+KILL_GRACE_SECONDS = 1
+
+class AccessDenied(Exception):
+    """Raised by the workspace_path dependency for paths outside the workspace."""
 
 class ExecuteRequest(BaseModel):
     """Request model for the /execute endpoint."""
@@ -36,38 +66,158 @@ class ExecuteResponse(BaseModel):
     stderr: str
     exit_code: int
 
+def is_within_workspace(path: str) -> bool:
+    """Prefix check against the workspace root; *path* must be normalized."""
+    return path == WORKSPACE_DIR or path.startswith(WORKSPACE_PREFIX)
+
 def get_safe_path(file_path: str) -> str:
     """Sanitizes the file path to ensure it stays within the workspace."""
-    base_dir = WORKSPACE_DIR
     # Remove leading slashes to ensure path is relative
     clean_path = file_path.lstrip("/")
-    full_path = os.path.realpath(os.path.join(base_dir, clean_path))
+    joined_path = os.path.join(WORKSPACE_DIR, clean_path)
+
+    # Reject ".." escapes lexically before touching the filesystem.
+    if PARENT_SEGMENT.search(clean_path) and not is_within_workspace(os.path.normpath(joined_path)):
+        raise ValueError("Access denied: Path must be within the workspace")
+
+    # Fast path: a single name directly under the already-resolved root can
+    # only escape through the leaf itself, which one lstat rules out.
+    if "/" not in clean_path and clean_path not in ("", "."):
+        try:
+            leaf_is_link = stat.S_ISLNK(os.lstat(joined_path).st_mode)
+        except FileNotFoundError:
+            leaf_is_link = False
+        except OSError:
+            leaf_is_link = True
+        if not leaf_is_link:
+            return joined_path
 
-    if os.path.commonpath([base_dir, full_path]) != base_dir:
+    # Symlinks inside the workspace can still point outside it.
+    full_path = os.path.realpath(joined_path)
+    if not is_within_workspace(full_path):
         raise ValueError("Access denied: Path must be within the workspace")
-    
+
     return full_path
 
+def decode_output(data: bytes) -> str:
+    """Decodes captured output with text-mode newlines; invalid UTF-8 is replaced."""
+    return data.decode("utf-8", "replace").replace("\r\n", "\n").replace("\r", "\n")
+
+def save_upload(src, file_path: str) -> None:
+    """Copies an upload to disk in fixed-size chunks so memory stays O(chunk)."""
+    # One buffer per upload, refilled with readinto instead of a new bytes
+    # object per chunk; per call because uploads run on concurrent threads.
+    buffer = bytearray(UPLOAD_CHUNK_SIZE)
+    view = memoryview(buffer)
+    # O_NOFOLLOW fails the open if a symlink was planted at the resolved
+    # path after get_safe_path checked it; 0o666 lets the umask apply as open() does.
+    fd = os.open(file_path, UPLOAD_OPEN_FLAGS, 0o666)
+    with open(fd, "wb") as f:
+        while size := src.readinto(buffer):
+            f.write(view[:size])
+
+def regular_file_stat(path: str) -> os.stat_result | None:
+    """Returns the stat of *path* if it is a regular file, otherwise None."""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Strong validator for the file contents: inode, mtime and size."""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Reports whether an If-None-Match header value covers *etag*."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def not_modified_since(if_modified_since: str, stat_result: os.stat_result) -> bool:
+    """Reports whether the file is unchanged since an If-Modified-Since date.
+
+    Unparseable dates are ignored, as RFC 9110 requires.
+    """
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Last-Modified has one-second resolution, so compare whole seconds.
+    return int(stat_result.st_mtime) <= since.timestamp()
+
+def scan_directory(path: str) -> list[dict]:
+    """Lists the entries of directory *path* with their size, type and mtime."""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            # Not following links: is_dir() comes from the readdir d_type
+            # and stat() is one lstat, and link targets outside the
+            # workspace are never stat'ed.
+            stats = entry.stat(follow_symlinks=False)
+            entries.append({
+                "name": entry.name,
+                "size": stats.st_size,
+                "type": "directory" if entry.is_dir(follow_symlinks=False) else "file",
+                "mod_time": stats.st_mtime
+            })
+    return entries
+
+def path_exists(path: str) -> bool:
+    """Probes an already-resolved *path* with a single lstat."""
+    try:
+        os.lstat(path)
+    except OSError:
+        return False
+    return True
+
+def workspace_path(file_path: str) -> str:
+    """Dependency resolving the file_path route parameter inside the workspace.
+
+    Declared sync so FastAPI runs it, and its filesystem calls, in the threadpool.
+    """
+    try:
+        return get_safe_path(file_path)
+    except ValueError:
+        raise AccessDenied() from None
+
+def ensure_workspace() -> None:
+    """Ensure the command/file workspace exists and is writable."""
+    # The image pre-creates the default tree; only a relocated or freshly
+    # mounted directory still needs creating.
+    for directory in (WORKSPACE_DIR, RUNTIME_DIR, CACHE_DIR, CONFIG_DIR):
+        if not os.access(directory, os.W_OK):
+            os.makedirs(directory, exist_ok=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the filesystem threadpool and prepare the workspace before serving."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = FILESYSTEM_THREADS
+    await run_in_threadpool(ensure_workspace)
+    yield
+
 app = FastAPI(
     title="Agentic Sandbox Runtime",
     description="An API server for executing commands and managing files in a secure sandbox.",
     version="1.0.0",
+    # orjson serializes in C, which matters for large /list payloads.
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+@app.exception_handler(AccessDenied)
+async def access_denied_handler(request: Request, exc: AccessDenied):
+    return ORJSONResponse(status_code=403, content={"message": "Access denied"})
+
 @app.get("/", summary="Health Check")
 async def health_check():
     """A simple health check endpoint to confirm the server is running."""
     return {"status": "ok", "message": "Sandbox Runtime is active."}
 
-
-@app.on_event("startup")
-async def ensure_workspace():
-    """Ensure the command/file workspace exists and is writable."""
-    os.makedirs(WORKSPACE_DIR, exist_ok=True)
-    os.makedirs(RUNTIME_DIR, exist_ok=True)
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-
 @app.post("/execute", summary="Execute a shell command", response_model=ExecuteResponse)
 async def execute_command(request: ExecuteRequest):
     """
@@ -75,28 +225,40 @@ async def execute_command(request: ExecuteRequest):
     Runs the full command string in a shell.
     """
     try:
-        cmd_env = os.environ.copy()
-        cmd_env.update(
-            {
-                "HOME": WORKSPACE_DIR,
-                "XDG_RUNTIME_DIR": RUNTIME_DIR,
-                "XDG_CACHE_HOME": CACHE_DIR,
-                "XDG_CONFIG_HOME": CONFIG_DIR,
-            }
-        )
-
-        # Execute the command from the isolated workspace directory.
-        process = subprocess.run(
+        # Execute the command from the isolated workspace directory. The
+        # pipes are drained by the event loop, so other requests keep running.
+        process = await asyncio.create_subprocess_shell(
             request.command,
-            capture_output=True,
-            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             cwd=WORKSPACE_DIR,
-            env=cmd_env,
-            shell=True,
+            env=COMMAND_ENV,
+            # Own process group, so a timeout can kill the shell's children too.
+            start_new_session=True,
         )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), EXECUTE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Kill the whole group: children left running would keep the pipes
+            # open, and wait() only returns once they close.
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(process.wait(), KILL_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                # A descendant that left the group (setsid) still holds the
+                # pipes; close them rather than wait for it.
+                process._transport.close()
+            return ExecuteResponse(
+                stdout="",
+                stderr=f"Command timed out after {EXECUTE_TIMEOUT} seconds",
+                exit_code=124
+            )
         return ExecuteResponse(
-            stdout=process.stdout,
-            stderr=process.stderr,
+            stdout=decode_output(stdout),
+            stderr=decode_output(stderr),
             exit_code=process.returncode
         )
     except Exception as e:
@@ -113,78 +275,76 @@ async def upload_file(file: UploadFile = File(...)):
     """
     try:
         logging.info(f"--- UPLOAD_FILE CALLED: Attempting to save '{file.filename}' ---")
-        file_path = get_safe_path(file.filename)
-        
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-            
-        return JSONResponse(
+        file_path = await run_in_threadpool(get_safe_path, file.filename)
+
+        # Copy off the event loop; the spooled upload may already be on disk.
+        await run_in_threadpool(save_upload, file.file, file_path)
+
+        return ORJSONResponse(
             status_code=200,
             content={"message": f"File '{file.filename}' uploaded successfully."}
         )
     except Exception as e:
         logging.exception("An error occurred during file upload.") 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"message": f"File upload failed: {str(e)}"}
         )
 
-@app.get("/download/{encoded_file_path:path}", summary="Download a file from the sandbox")
-async def download_file(encoded_file_path: str):
+@app.get("/download/{file_path:path}", summary="Download a file from the sandbox")
+async def download_file(
+    file_path: str,
+    full_path: str = Depends(workspace_path),
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+):
     """
     Downloads a specified file from the workspace directory in the sandbox.
     """
-    decoded_path = urllib.parse.unquote(encoded_file_path)
-    try:
-        full_path = get_safe_path(decoded_path)
-    except ValueError:
-        return JSONResponse(status_code=403, content={"message": "Access denied"})
-
-    if os.path.isfile(full_path):
-        return FileResponse(path=full_path, media_type='application/octet-stream', filename=decoded_path)
-    return JSONResponse(status_code=404, content={"message": "File not found"})
+    # One stat serves both the regular-file check and FileResponse, which
+    # would otherwise stat the path again before sending.
+    stat_result = await run_in_threadpool(regular_file_stat, full_path)
+    if stat_result is not None:
+        # A client holding the current version gets a 304 without the file
+        # being opened or sent. If-Modified-Since only counts when the
+        # request carries no If-None-Match.
+        etag = file_etag(stat_result)
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag)
+        else:
+            not_modified = if_modified_since is not None and not_modified_since(
+                if_modified_since, stat_result
+            )
+        if not_modified:
+            return Response(status_code=304, headers={"ETag": etag})
+        return FileResponse(
+            path=full_path,
+            media_type='application/octet-stream',
+            filename=file_path,
+            stat_result=stat_result,
+            headers={"ETag": etag},
+        )
+    return ORJSONResponse(status_code=404, content={"message": "File not found"})
 
-@app.get("/list/{encoded_file_path:path}", summary="List files in a directory")
-async def list_files(encoded_file_path: str):
+@app.get("/list/{file_path:path}", summary="List files in a directory")
+async def list_files(full_path: str = Depends(workspace_path)):
     """
     Lists the contents of a directory under the workspace directory in the sandbox.
     """
-    decoded_path = urllib.parse.unquote(encoded_file_path)
     try:
-        full_path = get_safe_path(decoded_path)
-    except ValueError:
-        return JSONResponse(status_code=403, content={"message": "Access denied"})
-
-    if not os.path.isdir(full_path):
-        return JSONResponse(status_code=404, content={"message": "Path is not a directory"})
-    
-    try:
-        entries = []
-        with os.scandir(full_path) as it:
-            for entry in it:
-                stats = entry.stat()
-                entries.append({
-                    "name": entry.name,
-                    "size": stats.st_size,
-                    "type": "directory" if entry.is_dir() else "file",
-                    "mod_time": stats.st_mtime
-                })
-        return JSONResponse(status_code=200, content=entries)
+        entries = await run_in_threadpool(scan_directory, full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return ORJSONResponse(status_code=404, content={"message": "Path is not a directory"})
     except Exception as e:
-        return JSONResponse(status_code=500, content={"message": f"List files failed: {str(e)}"})
+        return ORJSONResponse(status_code=500, content={"message": f"List files failed: {str(e)}"})
+    return ORJSONResponse(status_code=200, content=entries)
 
-@app.get("/exists/{encoded_file_path:path}", summary="Check if the relative path exists")
-async def exists(encoded_file_path: str):
+@app.get("/exists/{file_path:path}", summary="Check if the relative path exists")
+async def exists(file_path: str, full_path: str = Depends(workspace_path)):
     """
     Checks if a specified file or directory exists under the workspace directory in the sandbox.
     """
-    decoded_path = urllib.parse.unquote(encoded_file_path)
-    try:
-        full_path = get_safe_path(decoded_path)
-    except ValueError:
-        return JSONResponse(status_code=403, content={"message": "Access denied"})
-
-    return JSONResponse(status_code=200, content={
-        "path": decoded_path,
-        "exists": os.path.exists(full_path)
+    return ORJSONResponse(status_code=200, content={
+        "path": file_path,
+        "exists": await run_in_threadpool(path_exists, full_path)
     })
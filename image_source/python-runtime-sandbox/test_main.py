@@ -0,0 +1,347 @@
+"""Unit tests for the sandbox runtime server.
+
+The repository's dev dependency group installs what they need, so they
+run with the rest of the suite; they are skipped where FastAPI is missing.
+"""
+
+import io
+import os
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Point the server at a fresh, fully resolved workspace directory."""
+    root = os.path.realpath(tmp_path / "workspace")
+    os.makedirs(root)
+    monkeypatch.setattr(main, "WORKSPACE_DIR", root)
+    monkeypatch.setattr(main, "WORKSPACE_PREFIX", os.path.join(root, ""))
+    return root
+
+
+@pytest.fixture
+def client(workspace):
+    return TestClient(main.app)
+
+
+# ── /execute ─────────────────────────────────────────────────────────────────
+
+def test_execute_timeout_kills_compound_command(client, workspace, monkeypatch):
+    """A timed-out compound command returns promptly and its children die."""
+    monkeypatch.setattr(main, "EXECUTE_TIMEOUT", 1)
+
+    started = time.monotonic()
+    response = client.post(
+        "/execute", json={"command": "sleep 4; echo done > finished"}
+    )
+    elapsed = time.monotonic() - started
+
+    assert response.status_code == 200
+    assert response.json()["exit_code"] == 124
+    assert elapsed < 3, f"timeout took {elapsed:.1f}s"
+    time.sleep(4)
+    assert not os.path.exists(os.path.join(workspace, "finished"))
+
+
+def test_execute_timeout_with_detached_grandchild(client, workspace, monkeypatch):
+    """A grandchild outside the process group cannot hold the request open."""
+    monkeypatch.setattr(main, "EXECUTE_TIMEOUT", 1)
+
+    started = time.monotonic()
+    response = client.post("/execute", json={"command": "setsid sleep 10 & sleep 10"})
+    elapsed = time.monotonic() - started
+
+    assert response.status_code == 200
+    assert response.json()["exit_code"] == 124
+    assert elapsed < 4, f"timeout took {elapsed:.1f}s"
+
+
+def test_execute_output_replaces_invalid_utf8_and_translates_newlines(client):
+    response = client.post(
+        "/execute", json={"command": r"printf 'a\377b\r\nc\rd'; printf 'e\r\n' >&2"}
+    )
+
+    assert response.json() == {"stdout": "a\ufffdb\nc\nd", "stderr": "e\n", "exit_code": 0}
+
+
+def test_decode_output():
+    assert main.decode_output(b"ok\xff\xfe\r\n\r") == "ok\ufffd\ufffd\n\n"
+
+
+# ── /upload ──────────────────────────────────────────────────────────────────
+
+def test_upload_multi_chunk_payload(client, workspace):
+    payload = os.urandom(3 * main.UPLOAD_CHUNK_SIZE + 12345)
+
+    response = client.post("/upload", files={"file": ("big.bin", payload)})
+
+    assert response.status_code == 200
+    with open(os.path.join(workspace, "big.bin"), "rb") as f:
+        assert f.read() == payload
+
+
+def test_upload_truncates_existing_file(client, workspace):
+    with open(os.path.join(workspace, "notes.txt"), "w") as f:
+        f.write("a much longer previous version")
+
+    client.post("/upload", files={"file": ("notes.txt", b"short")})
+
+    with open(os.path.join(workspace, "notes.txt"), "rb") as f:
+        assert f.read() == b"short"
+
+
+def test_upload_through_symlink_outside_fails(client, workspace, tmp_path):
+    outside = tmp_path / "outside.txt"
+    outside.write_text("original")
+    os.symlink(outside, os.path.join(workspace, "link.txt"))
+
+    response = client.post("/upload", files={"file": ("link.txt", b"overwritten")})
+
+    assert response.status_code == 500
+    assert outside.read_text() == "original"
+
+
+def test_save_upload_refuses_symlink(workspace, tmp_path):
+    target = tmp_path / "target.txt"
+    target.write_text("original")
+    link = os.path.join(workspace, "link.txt")
+    os.symlink(target, link)
+
+    with pytest.raises(OSError):
+        main.save_upload(io.BytesIO(b"overwritten"), link)
+    assert target.read_text() == "original"
+
+
+def test_upload_missing_parent_directory_fails(client, workspace):
+    response = client.post("/upload", files={"file": ("missing/dir/a.txt", b"data")})
+
+    assert response.status_code == 500
+    assert not os.path.exists(os.path.join(workspace, "missing"))
+
+
+# ── /list and /exists ────────────────────────────────────────────────────────
+
+def test_list_reports_symlinks_as_files_with_their_own_size(client, workspace):
+    os.makedirs(os.path.join(workspace, "dir", "sub"))
+    with open(os.path.join(workspace, "dir", "big.txt"), "w") as f:
+        f.write("x" * 1000)
+    os.symlink("big.txt", os.path.join(workspace, "dir", "file-link"))
+    os.symlink("sub", os.path.join(workspace, "dir", "dir-link"))
+
+    response = client.get("/list/dir")
+
+    assert response.status_code == 200
+    entries = {entry["name"]: entry for entry in response.json()}
+    assert entries["big.txt"]["type"] == "file"
+    assert entries["big.txt"]["size"] == 1000
+    assert entries["sub"]["type"] == "directory"
+    for name, target in [("file-link", "big.txt"), ("dir-link", "sub")]:
+        assert entries[name]["type"] == "file"
+        assert entries[name]["size"] == len(target)
+
+
+def test_list_missing_directory_is_404(client):
+    response = client.get("/list/missing")
+
+    assert response.status_code == 404
+    assert response.json() == {"message": "Path is not a directory"}
+
+
+def test_responses_are_serialized_with_orjson(client, workspace):
+    orjson = pytest.importorskip("orjson")
+    os.makedirs(os.path.join(workspace, "dir"))
+    with open(os.path.join(workspace, "dir", "a.txt"), "w") as f:
+        f.write("a")
+
+    response = client.get("/list/dir")
+
+    assert main.app.router.default_response_class is main.ORJSONResponse
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == orjson.dumps(main.scan_directory(os.path.join(workspace, "dir")))
+
+
+@pytest.mark.parametrize(
+    ("path", "exists"),
+    [("a.txt", True), ("dir", True), ("link", True), ("missing", False), ("dangling", False)],
+)
+def test_exists(client, workspace, path, exists):
+    os.makedirs(os.path.join(workspace, "dir"))
+    with open(os.path.join(workspace, "a.txt"), "w") as f:
+        f.write("a")
+    os.symlink("a.txt", os.path.join(workspace, "link"))
+    os.symlink("gone.txt", os.path.join(workspace, "dangling"))
+
+    response = client.get(f"/exists/{path}")
+
+    assert response.status_code == 200
+    assert response.json() == {"path": path, "exists": exists}
+
+
+def test_path_exists_does_not_follow_symlinks(workspace):
+    link = os.path.join(workspace, "dangling")
+    os.symlink("gone.txt", link)
+
+    assert main.path_exists(link)
+    assert not main.path_exists(os.path.join(workspace, "gone.txt"))
+
+
+# ── get_safe_path ────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("path", ["..", "../x", "a/../../x", "/../etc/passwd", "a/b/../../../x"])
+def test_safe_path_rejects_parent_escapes(workspace, path):
+    with pytest.raises(ValueError):
+        main.get_safe_path(path)
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [("a/../b", "b"), ("a/b/..", "a"), ("a/..", ""), ("/a/./b/../c", "a/c")],
+)
+def test_safe_path_allows_parent_segments_inside(workspace, path, expected):
+    os.makedirs(os.path.join(workspace, "a", "b"))
+    assert main.get_safe_path(path) == os.path.normpath(os.path.join(workspace, expected))
+
+
+@pytest.mark.parametrize("path", ["", "/", ".", "./"])
+def test_safe_path_root(workspace, path):
+    assert main.get_safe_path(path) == workspace
+
+
+def test_safe_path_missing_leaf(workspace):
+    assert main.get_safe_path("missing") == os.path.join(workspace, "missing")
+    assert main.get_safe_path("no/such/file") == os.path.join(workspace, "no", "such", "file")
+
+
+def test_safe_path_rejects_symlinked_leaf_outside(workspace, tmp_path):
+    outside = tmp_path / "outside.txt"
+    outside.write_text("secret")
+    os.symlink(outside, os.path.join(workspace, "link"))
+    os.makedirs(os.path.join(workspace, "dir"))
+    os.symlink(outside, os.path.join(workspace, "dir", "link"))
+
+    with pytest.raises(ValueError):
+        main.get_safe_path("link")
+    with pytest.raises(ValueError):
+        main.get_safe_path("dir/link")
+
+
+def test_safe_path_resolves_symlinked_leaf_inside(workspace):
+    target = os.path.join(workspace, "target")
+    os.makedirs(target)
+    os.symlink(target, os.path.join(workspace, "link"))
+    assert main.get_safe_path("link") == target
+
+
+def test_safe_path_rejects_symlinked_parent_outside(workspace, tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "passwd").write_text("secret")
+    os.symlink(outside, os.path.join(workspace, "escape"))
+
+    with pytest.raises(ValueError):
+        main.get_safe_path("escape/passwd")
+    with pytest.raises(ValueError):
+        main.get_safe_path("escape/missing")
+
+
+@pytest.mark.parametrize("path", ["a\0b", "dir/a\0b"])
+def test_safe_path_rejects_nul_byte(workspace, path):
+    with pytest.raises(ValueError):
+        main.get_safe_path(path)
+
+
+@pytest.mark.parametrize("endpoint", ["download", "list", "exists"])
+def test_nul_byte_maps_to_403(client, endpoint):
+    response = client.get(f"/{endpoint}/a%00b")
+    assert response.status_code == 403
+    assert response.json() == {"message": "Access denied"}
+
+
+@pytest.mark.parametrize("endpoint", ["download", "list", "exists"])
+def test_parent_escape_maps_to_403(client, endpoint):
+    response = client.get(f"/{endpoint}/a%2F..%2F..%2Fx")
+    assert response.status_code == 403
+    assert response.json() == {"message": "Access denied"}
+
+
+# ── /download conditional requests ───────────────────────────────────────────
+
+@pytest.fixture
+def report(workspace):
+    path = os.path.join(workspace, "report.txt")
+    with open(path, "w") as f:
+        f.write("contents")
+    # A fixed, whole-second mtime keeps the If-Modified-Since cases exact.
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    return path
+
+
+def test_download_sends_etag(client, report):
+    response = client.get("/download/report.txt")
+
+    assert response.status_code == 200
+    assert response.content == b"contents"
+    assert response.headers["ETag"] == main.file_etag(os.stat(report))
+
+
+def test_download_matching_etag_is_304(client, report):
+    etag = client.get("/download/report.txt").headers["ETag"]
+
+    response = client.get("/download/report.txt", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("header", ["*", 'W/{etag}', '"other", {etag}'])
+def test_download_if_none_match_forms_are_304(client, report, header):
+    etag = client.get("/download/report.txt").headers["ETag"]
+
+    response = client.get(
+        "/download/report.txt", headers={"If-None-Match": header.format(etag=etag)}
+    )
+
+    assert response.status_code == 304
+
+
+def test_download_stale_etag_is_200(client, report):
+    response = client.get("/download/report.txt", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == b"contents"
+
+
+@pytest.mark.parametrize(
+    ("header", "status"),
+    [
+        ("Tue, 14 Nov 2023 22:13:20 GMT", 304),  # the file's mtime
+        ("Wed, 15 Nov 2023 00:00:00 GMT", 304),
+        ("Tue, 14 Nov 2023 22:13:19 GMT", 200),
+        ("not a date", 200),
+    ],
+)
+def test_download_if_modified_since(client, report, header, status):
+    response = client.get("/download/report.txt", headers={"If-Modified-Since": header})
+
+    assert response.status_code == status
+
+
+def test_download_if_none_match_overrides_if_modified_since(client, report):
+    response = client.get(
+        "/download/report.txt",
+        headers={
+            "If-None-Match": '"stale"',
+            "If-Modified-Since": "Wed, 15 Nov 2023 00:00:00 GMT",
+        },
+    )
+
+    assert response.status_code == 200
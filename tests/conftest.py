@@ -7,6 +7,7 @@ initializes it before any test module is imported.
 import asyncio
 
 import pulumi
+import pytest
 
 asyncio.set_event_loop(asyncio.new_event_loop())
 
@@ -28,3 +29,9 @@ class MockGcp(pulumi.runtime.Mocks):
 
 
 pulumi.runtime.set_mocks(MockGcp(), preview=False)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep downloads made during a test out of the user's ~/.cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
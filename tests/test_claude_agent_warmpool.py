@@ -18,6 +18,7 @@ cluster_result = create_cluster(
 
 controller = create_sandbox_controller(
     project_id="test-project",
+    project_number="123456789",
     region="us-central1",
     snapshots_bucket_name="test-snapshots-bucket",
     snapshot_folder="snapshots/v1",
@@ -25,6 +26,7 @@ controller = create_sandbox_controller(
     snapshot_ksa_name="snapshot-ksa",
     agent_sandbox_version="v0.1.0",
     node_pool=cluster_result.node_pool,
+    skip_manifest_cache=True,
 )
 
 result = create_claude_agent_warmpool(
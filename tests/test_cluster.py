@@ -133,6 +133,17 @@ def test_agent_node_pool_autoscaling():
     return result.node_pool.autoscaling.apply(check)
 
 
+@pulumi.runtime.test
+def test_node_pools_parented_to_cluster():
+    """Both node pools should be registered as children of the cluster."""
+    def check(urns):
+        for urn in urns:
+            assert "::gcp:container/cluster:Cluster$gcp:container/nodePool:NodePool::" in urn, urn
+    return pulumi.Output.all(
+        result.system_node_pool.urn, result.node_pool.urn
+    ).apply(check)
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def assert_eq(actual, expected):
@@ -1,11 +1,90 @@
 """Unit tests for helper functions."""
 
+import io
 import os
 from types import SimpleNamespace
 
+import pulumi
 import pytest
 
-from components.helpers import required_env, int_env, service_external_ip
+from components import helpers
+from components.helpers import (
+    bool_env,
+    cached_download,
+    child_opts,
+    config_key,
+    int_env,
+    int_envs,
+    load_env,
+    required_env,
+    required_envs,
+    service_external_ip,
+    stack_config_overrides,
+    stack_labels_transformation,
+    workload_pool,
+)
+
+
+# ── load_env ──────────────────────────────────────────────────────────────────
+
+def test_load_env_merges_dotenv_and_environment(tmp_path, monkeypatch):
+    """Process environment should override values parsed from the .env file."""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text('FROM_FILE="file"\nOVERRIDDEN="file"\n')
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    monkeypatch.setenv("OVERRIDDEN", "shell")
+    load_env.cache_clear()
+    try:
+        env = load_env(str(dotenv_file))
+    finally:
+        load_env.cache_clear()
+    assert env["FROM_FILE"] == "file"
+    assert env["OVERRIDDEN"] == "shell"
+
+
+def test_load_env_exports_dotenv_entries(tmp_path, monkeypatch):
+    """.env-only variables should reach os.environ without overriding the shell."""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text('DOTENV_ONLY="file"\nOVERRIDDEN="file"\n')
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    monkeypatch.setenv("OVERRIDDEN", "shell")
+    load_env.cache_clear()
+    try:
+        load_env(str(dotenv_file))
+    finally:
+        load_env.cache_clear()
+    assert os.environ["DOTENV_ONLY"] == "file"
+    assert os.environ["OVERRIDDEN"] == "shell"
+
+
+def test_load_env_parses_once(tmp_path, monkeypatch):
+    """Repeated calls should return the cached mapping without re-reading the file."""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("CACHED=1\n")
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    load_env.cache_clear()
+    try:
+        first = load_env(str(dotenv_file))
+        dotenv_file.write_text("CACHED=2\n")
+        assert load_env(str(dotenv_file)) is first
+    finally:
+        load_env.cache_clear()
+    assert first["CACHED"] == "1"
+
+
+# ── stack config ──────────────────────────────────────────────────────────────
+
+def test_config_key_is_camel_case():
+    assert config_key("GKE_VERSION") == "gkeVersion"
+    assert config_key("SNAPSHOTS_BUCKET_NAME_PREFIX") == "snapshotsBucketNamePrefix"
+
+
+def test_stack_config_overrides_only_returns_set_keys():
+    """Should map set stack config keys back to their env var names."""
+    config = SimpleNamespace(get={"gkeVersion": "1.36"}.get)
+    assert stack_config_overrides(config, ("GKE_VERSION", "CLUSTER_NAME")) == {
+        "GKE_VERSION": "1.36"
+    }
 
 
 # ── required_env ──────────────────────────────────────────────────────────────
@@ -30,6 +109,26 @@ def test_required_env_raises_when_empty(monkeypatch):
         required_env("TEST_VAR")
 
 
+def test_required_env_reads_from_snapshot(monkeypatch):
+    """Should read from the given mapping instead of the live environment."""
+    monkeypatch.setenv("TEST_VAR", "live")
+    assert required_env("TEST_VAR", {"TEST_VAR": "snapshot"}) == "snapshot"
+
+
+# ── required_envs ─────────────────────────────────────────────────────────────
+
+def test_required_envs_returns_values():
+    """Should return every requested value keyed by name."""
+    env = {"A": "1", "B": "2", "C": "3"}
+    assert required_envs(("A", "B"), env) == {"A": "1", "B": "2"}
+
+
+def test_required_envs_reports_all_missing():
+    """Should name every missing or empty variable in one error."""
+    with pytest.raises(ValueError, match="Missing required environment variables: B, C"):
+        required_envs(("A", "B", "C"), {"A": "1", "C": ""})
+
+
 # ── int_env ───────────────────────────────────────────────────────────────────
 
 def test_int_env_returns_parsed_int(monkeypatch):
@@ -51,6 +150,122 @@ def test_int_env_raises_on_non_integer(monkeypatch):
         int_env("TEST_INT", 0)
 
 
+def test_int_env_reads_from_snapshot(monkeypatch):
+    """Should read from the given mapping instead of the live environment."""
+    monkeypatch.setenv("TEST_INT", "1")
+    assert int_env("TEST_INT", 0, {"TEST_INT": "7"}) == 7
+    assert int_env("TEST_INT", 5, {}) == 5
+
+
+# ── int_envs ──────────────────────────────────────────────────────────────────
+
+def test_int_envs_parses_and_defaults():
+    """Should parse set variables and fall back to defaults for unset ones."""
+    assert int_envs({"A": 1, "B": 2}, {"A": "5"}) == {"A": 5, "B": 2}
+
+
+def test_int_envs_reports_all_invalid():
+    """Should name every non-integer variable in one error."""
+    with pytest.raises(ValueError, match="must be integers: A='x', C='1.5'"):
+        int_envs({"A": 1, "B": 2, "C": 3}, {"A": "x", "B": "4", "C": "1.5"})
+
+
+# ── bool_env ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("value", ["1", "true", "TRUE", "yes", "on"])
+def test_bool_env_true_values(value):
+    assert bool_env("FLAG", {"FLAG": value}) is True
+
+
+@pytest.mark.parametrize("value", ["", "0", "false", "No", "off"])
+def test_bool_env_false_values(value):
+    assert bool_env("FLAG", {"FLAG": value}) is False
+
+
+def test_bool_env_unset_is_false():
+    assert bool_env("FLAG", {}) is False
+
+
+def test_bool_env_raises_on_other_values():
+    with pytest.raises(ValueError, match="FLAG must be a boolean"):
+        bool_env("FLAG", {"FLAG": "maybe"})
+
+
+# ── workload_pool ─────────────────────────────────────────────────────────────
+
+def test_workload_pool():
+    assert workload_pool("my-project") == "my-project.svc.id.goog"
+
+
+# ── cached_download ───────────────────────────────────────────────────────────
+
+def test_cached_download_fetches_once(tmp_path, monkeypatch):
+    """Should download on first use and serve the cached file afterwards."""
+    calls = []
+
+    def fake_urlopen(url):
+        calls.append(url)
+        return io.BytesIO(b"kind: List\n")
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(helpers.urllib.request, "urlopen", fake_urlopen)
+
+    first = cached_download("https://example.com/v1/manifest.yaml", "pkg/v1/manifest.yaml")
+    second = cached_download("https://example.com/v1/manifest.yaml", "pkg/v1/manifest.yaml")
+
+    assert first == second == str(tmp_path / "pkg" / "v1" / "manifest.yaml")
+    assert calls == ["https://example.com/v1/manifest.yaml"]
+    with open(first, "rb") as f:
+        assert f.read() == b"kind: List\n"
+
+
+def test_cached_download_leaves_no_partial_file(tmp_path, monkeypatch):
+    """A failed download should not leave anything behind in the cache."""
+    def failing_urlopen(url):
+        raise OSError("network down")
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(helpers.urllib.request, "urlopen", failing_urlopen)
+
+    with pytest.raises(OSError, match="network down"):
+        cached_download("https://example.com/v1/manifest.yaml", "pkg/v1/manifest.yaml")
+    assert os.listdir(tmp_path / "pkg" / "v1") == []
+
+
+# ── child_opts ────────────────────────────────────────────────────────────────
+
+def test_child_opts_sets_parent_and_root_alias():
+    """Should parent the resource and alias it to its former top-level URN."""
+    parent = object()
+    opts = child_opts(parent, depends_on=[])
+    assert opts.parent is parent
+    assert opts.depends_on == []
+    assert len(opts.aliases) == 1
+    assert opts.aliases[0].parent is pulumi.ROOT_STACK_RESOURCE
+
+
+# ── stack_labels_transformation ───────────────────────────────────────────────
+
+def _transform_args(type_, props):
+    return SimpleNamespace(type_=type_, props=props, opts=pulumi.ResourceOptions())
+
+
+def test_stack_labels_added_without_mutating_input():
+    """Kubernetes objects should gain a stack label on a copy of their metadata."""
+    metadata = {"name": "svc", "labels": {"app": "api"}}
+    result = stack_labels_transformation(
+        _transform_args("kubernetes:core/v1:Service", {"metadata": metadata})
+    )
+    assert result.props["metadata"]["labels"] == {"app": "api", "stack": pulumi.get_stack()}
+    assert metadata["labels"] == {"app": "api"}
+
+
+def test_stack_labels_skip_non_kubernetes_and_yaml_components():
+    """GCP resources and kubernetes:yaml components should pass through untouched."""
+    for type_ in ("gcp:storage/bucket:Bucket", "kubernetes:yaml:ConfigFile"):
+        assert stack_labels_transformation(_transform_args(type_, {"metadata": {}})) is None
+
+
 # ── service_external_ip ──────────────────────────────────────────────────────
 
 def test_external_ip_none_status():
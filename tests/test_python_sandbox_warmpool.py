@@ -18,6 +18,7 @@ cluster_result = create_cluster(
 
 controller = create_sandbox_controller(
     project_id="test-project",
+    project_number="123456789",
     region="us-central1",
     snapshots_bucket_name="test-snapshots-bucket",
     snapshot_folder="snapshots/v1",
@@ -25,6 +26,7 @@ controller = create_sandbox_controller(
     snapshot_ksa_name="snapshot-ksa",
     agent_sandbox_version="v0.1.0",
     node_pool=cluster_result.node_pool,
+    skip_manifest_cache=True,
 )
 
 result = create_python_sandbox_warmpool(
@@ -111,12 +113,23 @@ def test_template_automount_disabled():
 
 
 @pulumi.runtime.test
-def test_template_command():
-    """Template should run uvicorn."""
+def test_template_uses_image_command():
+    """Template should leave the Uvicorn command and flags to the image CMD."""
     return result.sandbox_template.spec.apply(
         lambda v: assert_eq(
-            v["podTemplate"]["spec"]["containers"][0]["command"],
-            ["/usr/local/bin/uvicorn"],
+            {"command", "args"} & v["podTemplate"]["spec"]["containers"][0].keys(),
+            set(),
+        )
+    )
+
+
+@pulumi.runtime.test
+def test_template_container_port():
+    """Template should expose the port the image CMD serves on."""
+    return result.sandbox_template.spec.apply(
+        lambda v: assert_eq(
+            v["podTemplate"]["spec"]["containers"][0]["ports"][0]["containerPort"],
+            8888,
         )
     )
 
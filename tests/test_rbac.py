@@ -0,0 +1,62 @@
+"""Unit tests for the namespaced Role + RoleBinding factory."""
+
+import pulumi
+
+from components.rbac import create_role_grant
+
+RULES = [{"apiGroups": [""], "resources": ["pods"], "verbs": ["get"]}]
+
+result = create_role_grant(
+    name="test-grant",
+    role_name="test-role",
+    binding_name="test-binding",
+    namespace="test-ns",
+    rules=RULES,
+    service_account_name="test-sa",
+    service_account_namespace="sa-ns",
+)
+
+
+# ── Role ──────────────────────────────────────────────────────────────────────
+
+@pulumi.runtime.test
+def test_role_metadata():
+    """Role should use the given name and namespace."""
+    return result.role.metadata.apply(
+        lambda v: assert_eq((v["name"], v["namespace"]), ("test-role", "test-ns"))
+    )
+
+
+@pulumi.runtime.test
+def test_role_rules():
+    """Role should carry the provided rules."""
+    return result.role.rules.apply(
+        lambda v: assert_eq((v[0]["resources"], v[0]["verbs"]), (["pods"], ["get"]))
+    )
+
+
+# ── RoleBinding ───────────────────────────────────────────────────────────────
+
+@pulumi.runtime.test
+def test_binding_role_ref():
+    """Binding should reference the Role by name."""
+    return result.role_binding.role_ref.apply(
+        lambda v: assert_eq((v["kind"], v["name"]), ("Role", "test-role"))
+    )
+
+
+@pulumi.runtime.test
+def test_binding_subject():
+    """Binding should grant the Role to the given service account."""
+    return result.role_binding.subjects.apply(
+        lambda v: assert_eq(
+            (v[0]["kind"], v[0]["name"], v[0]["namespace"]),
+            ("ServiceAccount", "test-sa", "sa-ns"),
+        )
+    )
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def assert_eq(actual, expected):
+    assert actual == expected, f"Expected {expected!r}, got {actual!r}"
@@ -19,6 +19,7 @@ cluster_result = create_cluster(
 
 controller = create_sandbox_controller(
     project_id="test-project",
+    project_number="123456789",
     region="us-central1",
     snapshots_bucket_name="test-snapshots-bucket",
     snapshot_folder="snapshots/v1",
@@ -26,10 +27,12 @@ controller = create_sandbox_controller(
     snapshot_ksa_name="snapshot-ksa",
     agent_sandbox_version="v0.1.0",
     node_pool=cluster_result.node_pool,
+    skip_manifest_cache=True,
 )
 
 api = create_workspace_api(
     project_id="test-project",
+    project_number="123456789",
     region="us-central1",
     snapshot_ns=controller.snapshot_ns,
     system_node_pool=cluster_result.system_node_pool,
@@ -183,6 +186,17 @@ def test_deployment_topology_spread():
     )
 
 
+# ── Component ────────────────────────────────────────────────────────────────
+
+@pulumi.runtime.test
+def test_children_parented_to_component():
+    """Router resources should be registered under the SandboxRouter component."""
+    def check(urns):
+        for urn in urns:
+            assert "::agent-workspace:router:SandboxRouter$" in urn, urn
+    return pulumi.Output.all(result.deployment.urn, result.service.urn).apply(check)
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def assert_eq(actual, expected):
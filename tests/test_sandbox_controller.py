@@ -3,7 +3,7 @@
 import pulumi
 
 from components.cluster import create_cluster
-from components.sandbox_controller import create_sandbox_controller
+from components.sandbox_controller import _agent_sandbox_release_files, create_sandbox_controller
 
 # We need a real node_pool output to pass as dependency.
 cluster_result = create_cluster(
@@ -17,6 +17,7 @@ cluster_result = create_cluster(
 
 result = create_sandbox_controller(
     project_id="test-project",
+    project_number="123456789",
     region="us-central1",
     snapshots_bucket_name="test-snapshots-bucket",
     snapshot_folder="snapshots/v1",
@@ -24,6 +25,7 @@ result = create_sandbox_controller(
     snapshot_ksa_name="snapshot-ksa",
     agent_sandbox_version="v0.1.0",
     node_pool=cluster_result.node_pool,
+    skip_manifest_cache=True,
 )
 
 
@@ -97,6 +99,14 @@ def test_snapshot_ksa_namespace():
     )
 
 
+@pulumi.runtime.test
+def test_snapshot_ksa_parented_to_namespace():
+    """Snapshot KSA should be registered as a child of its namespace."""
+    return result.snapshot_ksa.urn.apply(
+        lambda v: assert_eq("kubernetes:core/v1:Namespace$kubernetes:core/v1:ServiceAccount::" in v, True)
+    )
+
+
 # ── Pod snapshot storage config ───────────────────────────────────────────────
 
 @pulumi.runtime.test
@@ -125,6 +135,15 @@ def test_pssc_gcs_path():
     )
 
 
+# ── Release manifests ─────────────────────────────────────────────────────────
+
+def test_release_files_skip_cache():
+    """skip_cache should hand ConfigFile the release URLs."""
+    assert _agent_sandbox_release_files("v0.1.0", "manifest.yaml", skip_cache=True) == [
+        "https://github.com/kubernetes-sigs/agent-sandbox/releases/download/v0.1.0/manifest.yaml"
+    ]
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def assert_eq(actual, expected):
@@ -0,0 +1,127 @@
+"""Unit tests for the shared sandbox warm pool builder."""
+
+import pulumi
+
+from components.cluster import create_cluster
+from components.sandbox_controller import create_sandbox_controller
+from components.sandbox_warmpool import create_sandbox_warmpool
+
+# Build prerequisites.
+cluster_result = create_cluster(
+    project_id="test-project",
+    region="us-central1",
+    min_gke_cluster_version="1.35.0-gke.100",
+    cluster_name="test-cluster",
+    machine_type="e2-standard-4",
+    node_pool_name="test-node-pool",
+)
+
+controller = create_sandbox_controller(
+    project_id="test-project",
+    project_number="123456789",
+    region="us-central1",
+    snapshots_bucket_name="test-snapshots-bucket",
+    snapshot_folder="snapshots/v1",
+    snapshot_namespace="snapshot-ns",
+    snapshot_ksa_name="snapshot-ksa",
+    agent_sandbox_version="v0.1.0",
+    node_pool=cluster_result.node_pool,
+    skip_manifest_cache=True,
+)
+
+CONTAINERS = [{"name": "runtime", "image": "example.com/runtime:v1"}]
+
+result = create_sandbox_warmpool(
+    template_name="test-template",
+    warm_pool_name="test-warmpool",
+    snapshot_ns=controller.snapshot_ns,
+    snapshot_ksa=controller.snapshot_ksa,
+    agent_sandbox_extensions=controller.agent_sandbox_extensions,
+    pod_snapshot_storage_config=controller.pod_snapshot_storage_config,
+    template_revision="7",
+    warm_pool_replicas=1,
+    containers=CONTAINERS,
+)
+
+with_volumes = create_sandbox_warmpool(
+    template_name="test-template-with-volumes",
+    warm_pool_name="test-warmpool-with-volumes",
+    snapshot_ns=controller.snapshot_ns,
+    snapshot_ksa=controller.snapshot_ksa,
+    agent_sandbox_extensions=controller.agent_sandbox_extensions,
+    pod_snapshot_storage_config=controller.pod_snapshot_storage_config,
+    template_revision="7",
+    warm_pool_replicas=1,
+    containers=CONTAINERS,
+    volumes=[{"name": "scratch", "emptyDir": {}}],
+)
+
+
+# ── SandboxTemplate ──────────────────────────────────────────────────────────
+
+@pulumi.runtime.test
+def test_template_pod_shell():
+    """Template pods should share the snapshot KSA and gVisor runtime shell."""
+    def check(v):
+        spec = v["podTemplate"]["spec"]
+        assert spec["serviceAccountName"] == "snapshot-ksa"
+        assert spec["automountServiceAccountToken"] is False
+        assert spec["runtimeClassName"] == "gvisor"
+        assert spec["restartPolicy"] == "OnFailure"
+        assert v["podTemplate"]["metadata"]["labels"] == {"app": "agent-sandbox-workload"}
+    return result.sandbox_template.spec.apply(check)
+
+
+@pulumi.runtime.test
+def test_template_containers():
+    """Template should run the provided containers."""
+    return result.sandbox_template.spec.apply(
+        lambda v: assert_eq(v["podTemplate"]["spec"]["containers"], CONTAINERS)
+    )
+
+
+@pulumi.runtime.test
+def test_template_omits_volumes_by_default():
+    """Template should not declare volumes unless some are given."""
+    return result.sandbox_template.spec.apply(
+        lambda v: assert_eq("volumes" in v["podTemplate"]["spec"], False)
+    )
+
+
+@pulumi.runtime.test
+def test_template_volumes():
+    """Template should declare the provided volumes."""
+    return with_volumes.sandbox_template.spec.apply(
+        lambda v: assert_eq(
+            v["podTemplate"]["spec"]["volumes"], [{"name": "scratch", "emptyDir": {}}]
+        )
+    )
+
+
+# ── SandboxWarmPool ──────────────────────────────────────────────────────────
+
+@pulumi.runtime.test
+def test_warmpool_template_ref():
+    """Warm pool should reference its template by name."""
+    return result.sandbox_warm_pool.spec.apply(
+        lambda v: assert_eq(v["sandboxTemplateRef"]["name"], "test-template")
+    )
+
+
+# ── Component ────────────────────────────────────────────────────────────────
+
+@pulumi.runtime.test
+def test_children_parented_to_component():
+    """Template and warm pool should be registered under the WarmPool component."""
+    def check(urns):
+        for urn in urns:
+            assert "::agent-workspace:sandbox:WarmPool$" in urn, urn
+    return pulumi.Output.all(
+        result.sandbox_template.urn, result.sandbox_warm_pool.urn
+    ).apply(check)
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def assert_eq(actual, expected):
+    assert actual == expected, f"Expected {expected!r}, got {actual!r}"
@@ -18,6 +18,7 @@ cluster_result = create_cluster(
 
 controller = create_sandbox_controller(
     project_id="test-project",
+    project_number="123456789",
     region="us-central1",
     snapshots_bucket_name="test-snapshots-bucket",
     snapshot_folder="snapshots/v1",
@@ -25,10 +26,12 @@ controller = create_sandbox_controller(
     snapshot_ksa_name="snapshot-ksa",
     agent_sandbox_version="v0.1.0",
     node_pool=cluster_result.node_pool,
+    skip_manifest_cache=True,
 )
 
 result = create_workspace_api(
     project_id="test-project",
+    project_number="123456789",
     region="us-central1",
     snapshot_ns=controller.snapshot_ns,
     system_node_pool=cluster_result.system_node_pool,
@@ -225,6 +228,14 @@ def test_ingress_class():
     )
 
 
+@pulumi.runtime.test
+def test_ingress_skips_await():
+    """Ingress should not block the update on load balancer provisioning."""
+    return result.fastapi_ingress.metadata.apply(
+        lambda v: assert_eq(v["annotations"]["pulumi.com/skipAwait"], "true")
+    )
+
+
 @pulumi.runtime.test
 def test_ingress_default_backend():
     """Ingress should route to the FastAPI service on port 80."""